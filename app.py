@@ -1,15 +1,67 @@
-from flask import Flask, request, render_template_string, redirect, url_for, send_from_directory, session, jsonify, flash
+from flask import Flask, request, render_template, redirect, url_for, send_from_directory, session, jsonify, flash, abort, make_response, g, has_request_context
 import os
+import sys
 import datetime
 import threading
+import time
+import atexit
+import tempfile
 import mimetypes
+import csv
+import io
 import json
+import re
 import logging
-import hashlib
+import queue
 import uuid
-from functools import wraps
-from logging.handlers import RotatingFileHandler
+import hmac
+from functools import wraps, lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import secrets
+from urllib.parse import quote
+from werkzeug.security import safe_join
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Prefer the fastpbkdf2 C implementation when available
+try:
+    from fastpbkdf2 import pbkdf2_hmac
+except ImportError:
+    from hashlib import pbkdf2_hmac
+
+# xxh3 for non-cryptographic content identity (duplicate uploads, page ETags)
+try:
+    import xxhash
+    _new_file_digest = xxhash.xxh3_64
+except ImportError:
+    import hashlib
+    _new_file_digest = partial(hashlib.blake2b, digest_size=8)
+
+# orjson for JSON files and API responses when available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional gzip/brotli compression of responses
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# argon2id for password hashes; PBKDF2 with a per-user salt is the fallback
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    PH = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+except ImportError:
+    PH = None
+
+# waitress as the production WSGI server; the Werkzeug dev server is the fallback
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
 
 # Configure structured logging
 def setup_logging():
@@ -31,36 +83,160 @@ def setup_logging():
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
     
+    # Request threads only enqueue; a background listener does the disk I/O
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # Formatting happens in the listener's handlers
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
     # Configure root logger
-    logging.basicConfig(level=logging.INFO, handlers=[file_handler, console_handler])
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
     
     return logging.getLogger(__name__)
 
 logger = setup_logging()
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)  # Generate secure secret key
+if Compress is not None:
+    app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'application/javascript', 'application/json']
+    app.config['COMPRESS_MIN_SIZE'] = 512
+    Compress(app)
+
+# flask-compress sends ETags as "<tag>:gzip" (or :br, ...); strip that from
+# If-None-Match so make_conditional compares against the uncompressed tag
+ETAG_CODING_SUFFIX = re.compile(r':(?:gzip|br|deflate|zstd)(?=")')
+
+@app.before_request
+def strip_etag_coding_suffix():
+    value = request.environ.get('HTTP_IF_NONE_MATCH')
+    if value and ':' in value:
+        request.environ['HTTP_IF_NONE_MATCH'] = ETAG_CODING_SUFFIX.sub('', value)
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+        
+        def dumps(self, obj, **kwargs):
+            option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    
+    app.json = OrjsonProvider(app)
 
 # Configuration
 UPLOAD_FOLDER = os.path.abspath('.')
 CONFIG_FILE = os.path.join(UPLOAD_FOLDER, 'server_config.json')
-USERS_FILE = os.path.join(UPLOAD_FOLDER, 'users.json')
-STATS_FILE = os.path.join(UPLOAD_FOLDER, 'file_stats.json')
+# Users and stats are rewritten often; keeping them (and their temp files) in
+# a hidden subfolder leaves the upload folder's mtime, and the listing cache, alone
+DATA_FOLDER = os.path.join(UPLOAD_FOLDER, '.data')
+SECRET_KEY_FILE = os.path.join(DATA_FOLDER, '.secret_key')
+USERS_FILE = os.path.join(DATA_FOLDER, 'users.json')
+STATS_FILE = os.path.join(DATA_FOLDER, 'file_stats.json')
+UPLOAD_WORKERS = 8
+SERVER_THREADS = 16  # waitress request threads
+FILES_PER_PAGE = 200
+MAX_FILES_PER_PAGE = 1000
+# Grid cards plus list rows (two per file) before filtering moves off the main thread;
+# below this a synchronous scan is cheaper than starting a worker
+FILTER_WORKER_MIN_ENTRIES = 2000
+UPLOAD_BUFFER_SIZE = 4 * 1024 * 1024  # 4MB copy buffer for saving uploads
+ZIP_CHUNK_SIZE = 1024 * 1024  # Read size when streaming bulk downloads
+PASSWORD_HASH_WORKERS = min(os.cpu_count() or 1, 4)  # Each argon2 hash uses ~64MB
+
+def migrate_data_files():
+    """Move the session key and users/stats files written by older versions into DATA_FOLDER"""
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    for filepath in (SECRET_KEY_FILE, USERS_FILE, STATS_FILE):
+        old_path = os.path.join(UPLOAD_FOLDER, os.path.basename(filepath))
+        if os.path.isfile(old_path) and not os.path.exists(filepath):
+            os.replace(old_path, filepath)
+            logger.info(f"Moved {old_path} to {filepath}")
+
+migrate_data_files()
+
+def load_secret_key():
+    """Load the session key, creating it (mode 0600) on first start"""
+    try:
+        fd = os.open(SECRET_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(SECRET_KEY_FILE, 'rb') as f:
+            return f.read()
+    key = secrets.token_bytes(32)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+# Persisted so sessions survive restarts and are shared across workers
+app.secret_key = load_secret_key()
 
 # Default configuration
 DEFAULT_CONFIG = {
     "host": "0.0.0.0",
     "port": 50588,
     "max_file_size": 5 * 1024 * 1024 * 1024,  # 5GB
+    "max_request_size": 0,  # Whole upload request; 0 allows max_file_size per upload worker
     "allowed_extensions": ["txt", "pdf", "png", "jpg", "jpeg", "gif", "mp4", "mp3", "doc", "docx", "xlsx"],
     "enable_public_sharing": True,
-    "theme": "light"
+    "theme": "light",
+    "sendfile": "",  # "x-sendfile" (Apache) or "x-accel-redirect" (nginx) when behind a proxy
+    "sendfile_prefix": "/_internal_uploads/"
 }
 
+# Password hashing
+PASSWORD_ITERATIONS = 100000
+LEGACY_PASSWORD_SALT = b'salt'  # Static salt used by hashes created before argon2
+
+def hash_password(password):
+    if PH is not None:
+        return PH.hash(password)
+    salt = secrets.token_bytes(16)
+    digest = pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PASSWORD_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+@lru_cache(maxsize=512)
+def _verify_cached(password, password_hash):
+    # In-process only; cleared on logout and user deletion
+    if password_hash.startswith('$argon2'):
+        if PH is None:
+            logger.error("argon2 password hash found but argon2-cffi is not installed")
+            return False
+        try:
+            return PH.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    if password_hash.startswith('pbkdf2_sha256$'):
+        _, iterations, salt, expected = password_hash.split('$')
+        derived = pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), int(iterations)).hex()
+    else:
+        expected = password_hash
+        derived = pbkdf2_hmac('sha256', password.encode('utf-8'), LEGACY_PASSWORD_SALT, PASSWORD_ITERATIONS).hex()
+    return hmac.compare_digest(derived, expected)
+
+def clear_password_cache():
+    _verify_cached.cache_clear()
+
+def verify_password(password, password_hash):
+    return _verify_cached(password, password_hash)
+
+def password_needs_rehash(password_hash):
+    """True for hashes that should be upgraded after a successful login"""
+    if PH is not None:
+        return not password_hash.startswith('$argon2') or PH.check_needs_rehash(password_hash)
+    return not password_hash.startswith('pbkdf2_sha256$')
+
 # Default users
 DEFAULT_USERS = {
     "admin": {
-        "password_hash": hashlib.pbkdf2_hmac('sha256', '1234'.encode('utf-8'), b'salt', 100000).hex(),
+        "password_hash": hash_password('1234'),
         "role": "admin",
         "created": datetime.datetime.now().isoformat()
     }
@@ -70,25 +246,142 @@ DEFAULT_USERS = {
 def load_json_file(filepath, default_data):
     if os.path.exists(filepath):
         try:
-            with open(filepath, 'r') as f:
-                return json.load(f)
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
         except Exception as e:
             logger.error(f"Error loading {filepath}: {e}")
     return default_data
 
-def save_json_file(filepath, data):
+def save_json_file(filepath, data, pretty=False):
+    tmp_path = None
     try:
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Serialize up front so the file gets a single write; indent only human-edited files
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        elif pretty:
+            payload = json.dumps(data, indent=2).encode('utf-8')
+        else:
+            payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        # Write to a hidden temp file and rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix='.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
         return True
     except Exception as e:
         logger.error(f"Error saving {filepath}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return False
 
+class JsonStore:
+    """In-memory copy of a JSON file, written back only after mutation"""
+    
+    def __init__(self, filepath, default_data, pretty=False):
+        self.filepath = filepath
+        self.pretty = pretty
+        self.lock = threading.RLock()
+        self.dirty = threading.Event()
+        self.mtime = self._disk_mtime()
+        self.data = load_json_file(filepath, default_data)
+    
+    def _disk_mtime(self):
+        try:
+            return os.stat(self.filepath).st_mtime_ns
+        except OSError:
+            return None
+    
+    def mutate(self, fn):
+        """Apply fn to a copy of the data under the lock, swap it in and mark the store dirty"""
+        with self.lock:
+            # Copy-on-write: readers iterate self.data without the lock, so the
+            # dict they hold must never change size under them
+            data = dict(self.data)
+            result = fn(data)
+            self.data = data
+            self.dirty.set()
+            return result
+    
+    def save(self):
+        with self.lock:
+            self.dirty.clear()
+            if save_json_file(self.filepath, self.data, pretty=self.pretty):
+                self.mtime = self._disk_mtime()
+    
+    def flush(self):
+        with self.lock:
+            if self.dirty.is_set():
+                self.save()
+    
+    def reload_if_changed(self):
+        """Pick up external edits to the file; pending local changes win"""
+        with self.lock:
+            mtime = self._disk_mtime()
+            if mtime is None or mtime == self.mtime or self.dirty.is_set():
+                return
+            data = load_json_file(self.filepath, None)
+            self.mtime = mtime
+            if isinstance(data, dict):
+                # Swap in a new dict so readers holding the old one are unaffected
+                self.data = data
+                logger.info(f"Reloaded {self.filepath}")
+
 # Load configuration and users
-config = load_json_file(CONFIG_FILE, DEFAULT_CONFIG)
-users = load_json_file(USERS_FILE, DEFAULT_USERS)
-file_stats = load_json_file(STATS_FILE, {})
+CONFIG_STORE = JsonStore(CONFIG_FILE, DEFAULT_CONFIG, pretty=True)
+USERS_STORE = JsonStore(USERS_FILE, DEFAULT_USERS, pretty=True)
+STATS_STORE = JsonStore(STATS_FILE, {})
+
+def request_size_limit(config):
+    """Cap on a whole request body; max_file_size is still checked per file"""
+    max_file_size = config.get('max_file_size', 100*1024*1024)
+    return config.get('max_request_size') or max_file_size * UPLOAD_WORKERS
+
+# Oversized requests are refused before any of the body is parsed
+app.config['MAX_CONTENT_LENGTH'] = request_size_limit(CONFIG_STORE.data)
+
+# Let a front-end server send upload bytes instead of the worker
+SENDFILE_MODE = CONFIG_STORE.data.get('sendfile', '')
+SENDFILE_PREFIX = CONFIG_STORE.data.get('sendfile_prefix', '/_internal_uploads/')
+app.config['USE_X_SENDFILE'] = bool(SENDFILE_MODE)
+
+# Timestamps
+def now_iso():
+    """Current time as ISO string, computed once per request"""
+    if not has_request_context():
+        return datetime.datetime.now().isoformat()
+    if 'now_iso' not in g:
+        g.now_iso = datetime.datetime.now().isoformat()
+    return g.now_iso
+
+# User management
+def bulk_add_users(entries):
+    """Create users from (username, password, role) tuples; returns the created usernames"""
+    pending = {}
+    for username, password, role in entries:
+        if username and password and username not in USERS_STORE.data and username not in pending:
+            pending[username] = (password, role if role in ('user', 'admin') else 'user')
+    if not pending:
+        return []
+    
+    # Both argon2 and hashlib release the GIL, so threads hash in parallel
+    with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS) as executor:
+        hashes = list(executor.map(hash_password, [password for password, _ in pending.values()]))
+    
+    created = now_iso()
+    def apply(users):
+        for (username, (_, role)), password_hash in zip(pending.items(), hashes):
+            users.setdefault(username, {
+                'password_hash': password_hash,
+                'role': role,
+                'created': created
+            })
+    
+    USERS_STORE.mutate(apply)
+    USERS_STORE.flush()
+    return list(pending)
 
 # Authentication decorator
 def login_required(f):
@@ -108,20 +401,15 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Password hashing
-def hash_password(password):
-    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt', 100000).hex()
-
-def verify_password(password, password_hash):
-    return hash_password(password) == password_hash
+# File statistics (buffered in memory, flushed periodically)
+STORE_FLUSH_INTERVAL = 5  # seconds
 
-# File statistics
-def update_file_stats(filename, action):
+def _apply_file_stat(file_stats, filename, action, now):
     if filename not in file_stats:
         file_stats[filename] = {
             'downloads': 0,
             'views': 0,
-            'uploaded': datetime.datetime.now().isoformat(),
+            'uploaded': now,
             'last_accessed': None
         }
     
@@ -130,20 +418,60 @@ def update_file_stats(filename, action):
     elif action == 'view':
         file_stats[filename]['views'] += 1
     
-    file_stats[filename]['last_accessed'] = datetime.datetime.now().isoformat()
-    save_json_file(STATS_FILE, file_stats)
+    file_stats[filename]['last_accessed'] = now
 
-# Enhanced HTML Template
-TEMPLATE = '''
-<!doctype html>
-<html lang="en" data-bs-theme="{{ theme }}">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>Enhanced File Server</title>
-  <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
-  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
-  <style>
+def update_file_stats(filename, action, now=None):
+    now = now or now_iso()
+    STATS_STORE.mutate(lambda file_stats: _apply_file_stat(file_stats, filename, action, now))
+
+def update_file_stats_bulk(filenames, action, now=None):
+    """Record the same action for several files under one lock acquisition"""
+    now = now or now_iso()
+    def apply(file_stats):
+        for filename in filenames:
+            _apply_file_stat(file_stats, filename, action, now)
+    
+    STATS_STORE.mutate(apply)
+
+def record_file_contents(contents):
+    """Store each file's content hash, size and mtime as computed at upload"""
+    def apply(file_stats):
+        for filename, content in contents.items():
+            if filename in file_stats:
+                file_stats[filename]['content'] = content
+    
+    STATS_STORE.mutate(apply)
+
+def remove_file_stats(filename):
+    if filename in STATS_STORE.data:
+        STATS_STORE.mutate(lambda file_stats: file_stats.pop(filename, None))
+
+def remove_file_stats_bulk(filenames):
+    """Drop stats for several files under one lock acquisition"""
+    def apply(file_stats):
+        for filename in filenames:
+            file_stats.pop(filename, None)
+    
+    STATS_STORE.mutate(apply)
+
+def flush_stores():
+    """Write any store with pending changes to disk"""
+    for store in (CONFIG_STORE, USERS_STORE, STATS_STORE):
+        store.flush()
+
+def _store_watcher():
+    while True:
+        time.sleep(STORE_FLUSH_INTERVAL)
+        for store in (CONFIG_STORE, USERS_STORE, STATS_STORE):
+            store.flush()
+            store.reload_if_changed()
+        app.config['MAX_CONTENT_LENGTH'] = request_size_limit(CONFIG_STORE.data)
+
+threading.Thread(target=_store_watcher, daemon=True).start()
+atexit.register(flush_stores)
+
+# Page stylesheet and script, served as long-lived cacheable assets
+PAGE_CSS = '''
     :root {
       --bs-primary: #007bff;
       --bs-secondary: #6c757d;
@@ -267,532 +595,49 @@ TEMPLATE = '''
     .theme-toggle:hover {
       transform: scale(1.1);
     }
-  </style>
-</head>
-<body>
-<div id="previewModal" class="preview-modal">
-  <span class="close-preview" onclick="closePreview()">&times;</span>
-  <div id="previewContent" class="preview-content"></div>
-</div>
-
-<nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-  <div class="container">
-    <a class="navbar-brand" href="#">
-      <i class="bi bi-hdd-network me-2"></i>Enhanced File Server
-    </a>
-    {% if session.logged_in %}
-    <div class="navbar-nav ms-auto d-flex flex-row gap-3">
-      <span class="navbar-text">Welcome, {{ session.username }}</span>
-      <i class="bi bi-moon-fill theme-toggle" id="themeToggle" title="Toggle Theme"></i>
-      {% if session.role == 'admin' %}
-      <a class="nav-link" href="{{ url_for('admin') }}"><i class="bi bi-gear"></i> Admin</a>
-      {% endif %}
-      <a class="nav-link" href="{{ url_for('logout') }}"><i class="bi bi-box-arrow-right"></i> Logout</a>
-      <a class="nav-link" href="{{ url_for('notepad') }}"><i class="bi bi-journal-text"></i> Notepad</a>
-    </div>
-    {% endif %}
-  </div>
-</nav>
+    
+    .filter-hidden {
+      display: none !important;
+    }
+    
+    /* Let the browser skip layout and paint for off-screen cards; table rows
+       don't establish containment, so the list view doesn't benefit */
+    .file-card {
+      content-visibility: auto;
+      contain-intrinsic-size: auto 220px;
+    }
+'''
 
-<div class="container py-4">
-  {% with messages = get_flashed_messages(with_categories=true) %}
-    {% if messages %}
-      {% for category, message in messages %}
-        <div class="alert alert-{{ 'danger' if category == 'error' else 'success' if category == 'success' else 'info' }} alert-dismissible fade show">
-          {{ message }}
-          <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-        </div>
-      {% endfor %}
-    {% endif %}
-  {% endwith %}
+PAGE_JS = '''
+document.addEventListener('DOMContentLoaded', function() {
+  // Theme toggle
+  const themeToggle = document.getElementById('themeToggle');
+  const html = document.documentElement;
+  
+  if (themeToggle) {
+    themeToggle.addEventListener('click', function() {
+      const currentTheme = html.getAttribute('data-bs-theme');
+      const newTheme = currentTheme === 'dark' ? 'light' : 'dark';
+      html.setAttribute('data-bs-theme', newTheme);
+      themeToggle.className = newTheme === 'dark' ? 'bi bi-sun-fill theme-toggle' : 'bi bi-moon-fill theme-toggle';
+      setPref('theme', newTheme);
+    });
+    
+    // Load saved theme
+    const savedTheme = PREFS.theme;
+    html.setAttribute('data-bs-theme', savedTheme);
+    themeToggle.className = savedTheme === 'dark' ? 'bi bi-sun-fill theme-toggle' : 'bi bi-moon-fill theme-toggle';
+  }
 
-  {% if not session.logged_in %}
-    <div class="row justify-content-center">
-      <div class="col-md-4">
-        <div class="card shadow">
-          <div class="card-body">
-            <h4 class="card-title text-center mb-4">
-              <i class="bi bi-shield-lock text-primary"></i> Login
-            </h4>
-            <form method="POST">
-              <div class="mb-3">
-                <label class="form-label">Username</label>
-                <input name="username" class="form-control" required>
-              </div>
-              <div class="mb-3">
-                <label class="form-label">Password</label>
-                <input type="password" name="password" class="form-control" required>
-              </div>
-              <button type="submit" class="btn btn-primary w-100">
-                <i class="bi bi-box-arrow-in-right me-2"></i>Login
-              </button>
-            </form>
-          </div>
-        </div>
-      </div>
-    </div>
-    
-  {% elif page == 'admin' %}
-    <div class="row">
-      <div class="col-12">
-        <h2><i class="bi bi-gear me-2"></i>Admin Panel</h2>
-        
-        <!-- Statistics Cards -->
-        <div class="row mb-4">
-          <div class="col-md-3">
-            <div class="card stats-card">
-              <div class="card-body text-center">
-                <i class="bi bi-files display-4 mb-2"></i>
-                <h3>{{ total_files }}</h3>
-                <p class="mb-0">Total Files</p>
-              </div>
-            </div>
-          </div>
-          <div class="col-md-3">
-            <div class="card stats-card">
-              <div class="card-body text-center">
-                <i class="bi bi-download display-4 mb-2"></i>
-                <h3>{{ total_downloads }}</h3>
-                <p class="mb-0">Downloads</p>
-              </div>
-            </div>
-          </div>
-          <div class="col-md-3">
-            <div class="card stats-card">
-              <div class="card-body text-center">
-                <i class="bi bi-people display-4 mb-2"></i>
-                <h3>{{ total_users }}</h3>
-                <p class="mb-0">Users</p>
-              </div>
-            </div>
-          </div>
-          <div class="col-md-3">
-            <div class="card stats-card">
-              <div class="card-body text-center">
-                <i class="bi bi-hdd display-4 mb-2"></i>
-                <h3>{{ disk_usage }}</h3>
-                <p class="mb-0">Disk Usage</p>
-              </div>
-            </div>
-          </div>
-        </div>
-        
-        <!-- User Management -->
-        <div class="card mb-4">
-          <div class="card-header">
-            <h5><i class="bi bi-people me-2"></i>User Management</h5>
-          </div>
-          <div class="card-body">
-            <form method="POST" action="{{ url_for('admin') }}" class="row g-3 mb-3">
-              <div class="col-md-4">
-                <label class="form-label">Username</label>
-                <input type="text" name="new_username" class="form-control" required>
-              </div>
-              <div class="col-md-4">
-                <label class="form-label">Password</label>
-                <input type="password" name="new_password" class="form-control" required>
-              </div>
-              <div class="col-md-2">
-                <label class="form-label">Role</label>
-                <select name="new_role" class="form-select">
-                  <option value="user">User</option>
-                  <option value="admin">Admin</option>
-                </select>
-              </div>
-              <div class="col-md-2 d-flex align-items-end">
-                <button type="submit" name="action" value="add_user" class="btn btn-success">
-                  <i class="bi bi-person-plus"></i> Add User
-                </button>
-              </div>
-            </form>
-            
-            <div class="table-responsive">
-              <table class="table table-hover">
-                <thead>
-                  <tr>
-                    <th>Username</th>
-                    <th>Role</th>
-                    <th>Created</th>
-                    <th>Actions</th>
-                  </tr>
-                </thead>
-                <tbody>
-                  {% for username, user_data in users.items() %}
-                  <tr>
-                    <td>{{ username }}</td>
-                    <td><span class="badge bg-{{ 'danger' if user_data.role == 'admin' else 'primary' }}">{{ user_data.role }}</span></td>
-                    <td>{{ user_data.created.split('T')[0] }}</td>
-                    <td>
-                      {% if username != 'admin' %}
-                      <form method="POST" action="{{ url_for('admin') }}" class="d-inline">
-                        <input type="hidden" name="username" value="{{ username }}">
-                        <button type="submit" name="action" value="delete_user" class="btn btn-sm btn-danger" 
-                                onclick="return confirm('Delete user {{ username }}?')">
-                          <i class="bi bi-trash"></i>
-                        </button>
-                      </form>
-                      {% endif %}
-                    </td>
-                  </tr>
-                  {% endfor %}
-                </tbody>
-              </table>
-            </div>
-          </div>
-        </div>
-        
-        <!-- File Statistics -->
-        <div class="card">
-          <div class="card-header">
-            <h5><i class="bi bi-bar-chart me-2"></i>File Statistics</h5>
-          </div>
-          <div class="card-body">
-            <div class="table-responsive">
-              <table class="table table-hover">
-                <thead>
-                  <tr>
-                    <th>File</th>
-                    <th>Downloads</th>
-                    <th>Views</th>
-                    <th>Uploaded</th>
-                    <th>Last Accessed</th>
-                  </tr>
-                </thead>
-                <tbody>
-                  {% for filename, stats in file_stats.items() %}
-                  <tr>
-                    <td>{{ filename }}</td>
-                    <td><span class="badge bg-primary">{{ stats.downloads }}</span></td>
-                    <td><span class="badge bg-info">{{ stats.views }}</span></td>
-                    <td>{{ stats.uploaded.split('T')[0] if stats.uploaded else 'Unknown' }}</td>
-                    <td>{{ stats.last_accessed.split('T')[0] if stats.last_accessed else 'Never' }}</td>
-                  </tr>
-                  {% endfor %}
-                </tbody>
-              </table>
-            </div>
-          </div>
-        </div>
-      </div>
-    </div>
-    
-  {% elif page == 'notepad' %}
-    <div class="row">
-      <div class="col-12">
-        <div class="card mb-4">
-          <div class="card-header d-flex justify-content-between align-items-center">
-            <h5 class="mb-0"><i class="bi bi-journal-text me-2"></i>Notepad</h5>
-            <div class="btn-group">
-              <button class="btn btn-primary" onclick="saveNotepad()">
-                <i class="bi bi-save me-2"></i>Save
-              </button>
-              <button class="btn btn-outline-secondary" onclick="newNotepad()">
-                <i class="bi bi-file-earmark-plus me-2"></i>New
-              </button>
-            </div>
-          </div>
-          <div class="card-body">
-            <div class="row">
-              <div class="col-md-3">
-                <div class="list-group mb-3">
-                  <div class="list-group-item list-group-item-action active">
-                    <i class="bi bi-journal-text me-2"></i>My Notes
-                  </div>
-                  {% for file in notepad_files %}
-                  <a href="#" class="list-group-item list-group-item-action" onclick="loadNotepad('{{ file.name }}')">
-                    <div class="d-flex justify-content-between align-items-center">
-                      <span><i class="bi bi-file-text me-2"></i>{{ file.name }}</span>
-                      <small class="text-muted">{{ file.modified }}</small>
-                    </div>
-                  </a>
-                  {% endfor %}
-                </div>
-              </div>
-              <div class="col-md-9">
-                <form id="notepadForm" method="POST">
-                  <div class="mb-3">
-                    <input type="text" class="form-control" id="notepadFilename" name="filename" placeholder="Enter filename (e.g., mynote.txt)" required>
-                  </div>
-                  <textarea class="form-control" id="notepadContent" name="content" rows="20" style="resize: none; font-family: monospace;"></textarea>
-                </form>
-              </div>
-            </div>
-          </div>
-        </div>
-      </div>
-    </div>
-  {% else %}
-    <!-- File Management Interface -->
-    <div class="row">
-      <div class="col-12">
-        <!-- Upload Section -->
-        <div class="card mb-4">
-          <div class="card-body">
-            <h5 class="card-title"><i class="bi bi-cloud-upload me-2"></i>Upload Files</h5>
-            <form id="uploadForm" method="POST" enctype="multipart/form-data" action="/upload">
-              <div class="drop-zone mb-3" id="dropZone">
-                <i class="bi bi-cloud-upload display-4 text-muted mb-2"></i>
-                <p class="mb-2">Drag & drop files here or click to browse</p>
-                <p class="text-muted small">Maximum file size: {{ max_file_size }}</p>
-                <input type="file" id="fileInput" name="files" class="d-none" multiple>
-              </div>
-              
-              <div id="fileList" class="mb-3"></div>
-              
-              <div class="progress mb-3 d-none" id="uploadProgress">
-                <div class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: 0%"></div>
-              </div>
-              
-              <div id="uploadStatus" class="mb-3"></div>
-              
-              <div class="d-flex gap-2">
-                <button class="btn btn-success" type="submit" id="uploadBtn" disabled>
-                  <i class="bi bi-cloud-upload me-2"></i>Upload Files
-                </button>
-                <button class="btn btn-outline-secondary" type="button" id="clearBtn" onclick="clearFiles()">
-                  <i class="bi bi-x-circle me-2"></i>Clear
-                </button>
-              </div>
-            </form>
-          </div>
-        </div>
-        
-        <!-- Search and Filter -->
-        <div class="card mb-4">
-          <div class="card-body">
-            <div class="row g-3">
-              <div class="col-md-6">
-                <div class="search-container">
-                  <i class="bi bi-search"></i>
-                  <input type="text" id="searchInput" class="form-control search-input" placeholder="Search files...">
-                </div>
-              </div>
-              <div class="col-md-3">
-                <select id="typeFilter" class="form-select">
-                  <option value="">All Types</option>
-                  <option value="image">Images</option>
-                  <option value="video">Videos</option>
-                  <option value="audio">Audio</option>
-                  <option value="pdf">PDFs</option>
-                  <option value="text">Text</option>
-                  <option value="other">Other</option>
-                </select>
-              </div>
-              <div class="col-md-3">
-                <div class="btn-group w-100" role="group">
-                  <button type="button" class="btn btn-outline-primary active" id="gridView">
-                    <i class="bi bi-grid"></i>
-                  </button>
-                  <button type="button" class="btn btn-outline-primary" id="listView">
-                    <i class="bi bi-list"></i>
-                  </button>
-                </div>
-              </div>
-            </div>
-          </div>
-        </div>
-        
-        <!-- Bulk Actions -->
-        <div class="card mb-4 d-none" id="bulkActions">
-          <div class="card-body">
-            <div class="d-flex align-items-center gap-3">
-              <span><span id="selectedCount">0</span> files selected</span>
-              <button class="btn btn-danger btn-sm" onclick="bulkDelete()">
-                <i class="bi bi-trash me-2"></i>Delete Selected
-              </button>
-              <button class="btn btn-primary btn-sm" onclick="bulkDownload()">
-                <i class="bi bi-download me-2"></i>Download Selected
-              </button>
-              <button class="btn btn-outline-secondary btn-sm" onclick="clearSelection()">
-                <i class="bi bi-x me-2"></i>Clear Selection
-              </button>
-            </div>
-          </div>
-        </div>
-        
-        <!-- Files Display -->
-        <div class="card">
-          <div class="card-body">
-            <div id="filesGridView" class="file-grid">
-              {% for file in files %}
-                <div class="file-card" data-filename="{{ file.name }}" data-type="{{ file.type }}">
-                  <div class="d-flex justify-content-between align-items-start mb-2">
-                    <div class="form-check">
-                      <input class="form-check-input file-checkbox" type="checkbox" value="{{ file.name }}">
-                    </div>
-                    <span class="badge badge-file-type bg-{{ 'primary' if file.type == 'image' else 'danger' if file.type == 'video' else 'success' if file.type == 'audio' else 'warning' if file.type == 'pdf' else 'secondary' }}">
-                      {{ file.type }}
-                    </span>
-                  </div>
-                  
-                  <div class="text-center mb-3">
-                    {% if file.type == 'image' %}
-                      <i class="bi bi-file-image text-primary" style="font-size: 3rem;"></i>
-                    {% elif file.type == 'video' %}
-                      <i class="bi bi-file-play text-danger" style="font-size: 3rem;"></i>
-                    {% elif file.type == 'audio' %}
-                      <i class="bi bi-file-music text-success" style="font-size: 3rem;"></i>
-                    {% elif file.type == 'pdf' %}
-                      <i class="bi bi-file-pdf text-danger" style="font-size: 3rem;"></i>
-                    {% elif file.type == 'text' %}
-                      <i class="bi bi-file-text text-secondary" style="font-size: 3rem;"></i>
-                    {% else %}
-                      <i class="bi bi-file-earmark" style="font-size: 3rem;"></i>
-                    {% endif %}
-                  </div>
-                  
-                  <h6 class="card-title text-truncate" title="{{ file.name }}">{{ file.name }}</h6>
-                  <p class="card-text small text-muted">
-                    Size: {{ file.size }}<br>
-                    Modified: {{ file.modified }}<br>
-                    {% if file.name in file_stats %}
-                    Downloads: {{ file_stats[file.name].downloads | default(0) }}
-                    {% endif %}
-                  </p>
-                  
-                  <div class="btn-group w-100" role="group">
-                    {% if file.type in ['image', 'video', 'audio', 'pdf'] %}
-                    <button class="btn btn-sm btn-info" onclick="previewFile('{{ file.type }}', '{{ url_for('files_raw', filename=file.name) }}', '{{ file.name }}')">
-                      <i class="bi bi-eye"></i>
-                    </button>
-                    {% endif %}
-                    <a href="{{ url_for('download', filename=file.name) }}" class="btn btn-sm btn-primary">
-                      <i class="bi bi-download"></i>
-                    </a>
-                    <button class="btn btn-sm btn-danger" onclick="deleteFile('{{ file.name }}')">
-                      <i class="bi bi-trash"></i>
-                    </button>
-                  </div>
-                </div>
-              {% endfor %}
-              {% if not files %}
-                <div class="col-12 text-center py-5">
-                  <i class="bi bi-inbox display-4 text-muted mb-3"></i>
-                  <h5 class="text-muted">No files found</h5>
-                  <p class="text-muted">Upload some files to get started</p>
-                </div>
-              {% endif %}
-            </div>
-            
-            <!-- List View (Hidden by default) -->
-            <div id="filesListView" class="d-none">
-              <div class="table-responsive">
-                <table class="table table-hover">
-                  <thead>
-                    <tr>
-                      <th width="40">
-                        <input type="checkbox" id="selectAll" class="form-check-input">
-                      </th>
-                      <th>Type</th>
-                      <th>Filename</th>
-                      <th>Size</th>
-                      <th>Modified</th>
-                      <th>Stats</th>
-                      <th>Actions</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    {% for file in files %}
-                      <tr data-filename="{{ file.name }}" data-type="{{ file.type }}">
-                        <td>
-                          <input class="form-check-input file-checkbox" type="checkbox" value="{{ file.name }}">
-                        </td>
-                        <td>
-                          {% if file.type == 'image' %}
-                            <i class="bi bi-file-image text-primary file-icon"></i>
-                          {% elif file.type == 'video' %}
-                            <i class="bi bi-file-play text-danger file-icon"></i>
-                          {% elif file.type == 'audio' %}
-                            <i class="bi bi-file-music text-success file-icon"></i>
-                          {% elif file.type == 'pdf' %}
-                            <i class="bi bi-file-pdf text-danger file-icon"></i>
-                          {% elif file.type == 'text' %}
-                            <i class="bi bi-file-text text-secondary file-icon"></i>
-                          {% else %}
-                            <i class="bi bi-file-earmark file-icon"></i>
-                          {% endif %}
-                        </td>
-                        <td>
-                          {% if file.type in ['image', 'video', 'audio', 'pdf'] %}
-                            <a href="#" onclick="previewFile('{{ file.type }}', '{{ url_for('files_raw', filename=file.name) }}', '{{ file.name }}'); return false;">{{ file.name }}</a>
-                          {% else %}
-                            {{ file.name }}
-                          {% endif %}
-                        </td>
-                        <td>{{ file.size }}</td>
-                        <td>{{ file.modified }}</td>
-                        <td>
-                          {% if file.name in file_stats %}
-                          <small>
-                            <i class="bi bi-download me-1"></i>{{ file_stats[file.name].downloads | default(0) }}
-                            <i class="bi bi-eye ms-2 me-1"></i>{{ file_stats[file.name].views | default(0) }}
-                          </small>
-                          {% else %}
-                          <small class="text-muted">No data</small>
-                          {% endif %}
-                        </td>
-                        <td>
-                          <div class="btn-group" role="group">
-                            {% if file.type in ['image', 'video', 'audio', 'pdf'] %}
-                            <button class="btn btn-sm btn-info" onclick="previewFile('{{ file.type }}', '{{ url_for('files_raw', filename=file.name) }}', '{{ file.name }}')">
-                              <i class="bi bi-eye"></i>
-                            </button>
-                            {% endif %}
-                            <a href="{{ url_for('download', filename=file.name) }}" class="btn btn-sm btn-primary">
-                              <i class="bi bi-download"></i>
-                            </a>
-                            <button class="btn btn-sm btn-danger" onclick="deleteFile('{{ file.name }}')">
-                              <i class="bi bi-trash"></i>
-                            </button>
-                          </div>
-                        </td>
-                      </tr>
-                    {% endfor %}
-                  </tbody>
-                </table>
-              </div>
-            </div>
-          </div>
-        </div>
-      </div>
-    </div>
-  {% endif %}
-</div>
-
-<!-- Hidden forms -->
-<form id="deleteForm" method="POST" style="display:none;"></form>
-
-<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js"></script>
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-  // Theme toggle
-  const themeToggle = document.getElementById('themeToggle');
-  const html = document.documentElement;
-  
-  if (themeToggle) {
-    themeToggle.addEventListener('click', function() {
-      const currentTheme = html.getAttribute('data-bs-theme');
-      const newTheme = currentTheme === 'dark' ? 'light' : 'dark';
-      html.setAttribute('data-bs-theme', newTheme);
-      themeToggle.className = newTheme === 'dark' ? 'bi bi-sun-fill theme-toggle' : 'bi bi-moon-fill theme-toggle';
-      localStorage.setItem('theme', newTheme);
-    });
-    
-    // Load saved theme
-    const savedTheme = localStorage.getItem('theme') || 'light';
-    html.setAttribute('data-bs-theme', savedTheme);
-    themeToggle.className = savedTheme === 'dark' ? 'bi bi-sun-fill theme-toggle' : 'bi bi-moon-fill theme-toggle';
-  }
-
-  // Drag and drop functionality
-  const dropZone = document.getElementById('dropZone');
-  const fileInput = document.getElementById('fileInput');
-  const fileList = document.getElementById('fileList');
-  const uploadBtn = document.getElementById('uploadBtn');
-  
-  if (dropZone && fileInput) {
-    // Click to select files
-    dropZone.addEventListener('click', () => fileInput.click());
+  // Drag and drop functionality
+  const dropZone = document.getElementById('dropZone');
+  const fileInput = document.getElementById('fileInput');
+  const fileList = document.getElementById('fileList');
+  const uploadBtn = document.getElementById('uploadBtn');
+  
+  if (dropZone && fileInput) {
+    // Click to select files
+    dropZone.addEventListener('click', () => fileInput.click());
     
     // Drag and drop events
     dropZone.addEventListener('dragover', function(e) {
@@ -831,12 +676,29 @@ document.addEventListener('DOMContentLoaded', function() {
   const searchInput = document.getElementById('searchInput');
   const typeFilter = document.getElementById('typeFilter');
   
+  // The file list is static for the page's lifetime, so read it once
+  fileEntries = Array.from(document.querySelectorAll('[data-filename]'), el => ({
+    el: el,
+    name: el.dataset.filename.toLowerCase(),
+    type: el.dataset.type
+  }));
+  startFilterWorker();
+  
   if (searchInput) {
-    searchInput.addEventListener('input', filterFiles);
+    searchInput.addEventListener('input', debounce(filterFiles, 150));
   }
   
+  // Filtering in the page only sees the current page; when there are others
+  // the type filter goes to the server, as does the search on Enter
+  const filterForm = document.getElementById('filterForm');
   if (typeFilter) {
-    typeFilter.addEventListener('change', filterFiles);
+    typeFilter.addEventListener('change', function() {
+      if (filterForm && filterForm.dataset.paginated) {
+        filterForm.submit();
+      } else {
+        filterFiles();
+      }
+    });
   }
   
   // View toggle
@@ -851,7 +713,7 @@ document.addEventListener('DOMContentLoaded', function() {
       listView.classList.remove('active');
       gridContainer.classList.remove('d-none');
       listContainer.classList.add('d-none');
-      localStorage.setItem('viewMode', 'grid');
+      setPref('viewMode', 'grid');
     });
     
     listView.addEventListener('click', function() {
@@ -859,32 +721,55 @@ document.addEventListener('DOMContentLoaded', function() {
       gridView.classList.remove('active');
       listContainer.classList.remove('d-none');
       gridContainer.classList.add('d-none');
-      localStorage.setItem('viewMode', 'list');
+      setPref('viewMode', 'list');
     });
     
     // Load saved view mode
-    const savedView = localStorage.getItem('viewMode') || 'grid';
+    const savedView = PREFS.viewMode;
     if (savedView === 'list') {
       listView.click();
     }
   }
   
-  // Bulk selection
+  // Bulk selection; the browser may restore checked boxes on back navigation
+  fileCheckboxes = document.getElementsByClassName('file-checkbox');
+  checkedCount = checkedFilenames().length;
+  updateBulkActions();
+  
   const selectAll = document.getElementById('selectAll');
   if (selectAll) {
     selectAll.addEventListener('change', function() {
-      const checkboxes = document.querySelectorAll('.file-checkbox');
-      checkboxes.forEach(cb => cb.checked = this.checked);
+      for (const cb of fileCheckboxes) {
+        cb.checked = this.checked;
+      }
+      checkedCount = this.checked ? fileCheckboxes.length : 0;
       updateBulkActions();
     });
   }
   
-  // File checkboxes
-  document.addEventListener('change', function(e) {
-    if (e.target.classList.contains('file-checkbox')) {
-      updateBulkActions();
-    }
-  });
+  // One delegated listener per view handles every file's checkbox and buttons
+  for (const container of [gridContainer, listContainer]) {
+    if (!container) continue;
+    
+    container.addEventListener('change', function(e) {
+      if (e.target.classList.contains('file-checkbox')) {
+        checkedCount += e.target.checked ? 1 : -1;
+        updateBulkActions();
+      }
+    });
+    
+    container.addEventListener('click', function(e) {
+      const target = e.target.closest('[data-action]');
+      if (!target) return;
+      e.preventDefault();
+      const item = target.closest('[data-filename]');
+      if (target.dataset.action === 'preview') {
+        previewFile(item.dataset.type, target.dataset.src, item.dataset.filename);
+      } else if (target.dataset.action === 'delete') {
+        deleteFile(item.dataset.filename);
+      }
+    });
+  }
 });
 
 function displaySelectedFiles(files) {
@@ -924,13 +809,16 @@ function uploadFiles() {
     return;
   }
   
+  // File parts are streamed from disk by the browser, not copied into memory
   const formData = new FormData();
-  for (let i = 0; i < fileInput.files.length; i++) {
-    formData.append('files', fileInput.files[i]);
+  for (const file of fileInput.files) {
+    formData.append('files', file);
   }
   
+  // XHR rather than fetch: fetch has no upload progress over HTTP/1.1
   const xhr = new XMLHttpRequest();
   xhr.open('POST', '/upload', true);
+  xhr.responseType = 'json';
   
   xhr.upload.addEventListener('progress', function(e) {
     if (e.lengthComputable) {
@@ -946,237 +834,926 @@ function uploadFiles() {
   };
   
   xhr.onload = function() {
+    const response = xhr.response || {};
     if (xhr.status === 200) {
-      const response = JSON.parse(xhr.responseText);
       statusDiv.innerHTML = `<div class="alert alert-success"><i class="bi bi-check-circle me-2"></i>${response.message}</div>`;
-      setTimeout(() => window.location.reload(), 1500);
+      // Names are client-controlled, so they go in as text
+      const notes = [
+        ...(response.renamed || []).map(f => `${f.original} saved as ${f.filename}`),
+        ...(response.skipped || []).map(f => `${f.original} skipped: ${f.reason}`)
+      ];
+      if (notes.length) {
+        const list = document.createElement('ul');
+        list.className = 'mb-0 mt-2 small';
+        notes.forEach(note => {
+          const item = document.createElement('li');
+          item.textContent = note;
+          list.appendChild(item);
+        });
+        statusDiv.firstChild.appendChild(list);
+      }
+      setTimeout(() => window.location.reload(), notes.length ? 6000 : 1500);
     } else {
-      statusDiv.innerHTML = '<div class="alert alert-danger"><i class="bi bi-exclamation-triangle me-2"></i>Upload failed</div>';
+      statusDiv.innerHTML = `<div class="alert alert-danger"><i class="bi bi-exclamation-triangle me-2"></i>${response.message || 'Upload failed'}</div>`;
+    }
+  };
+  
+  xhr.onerror = function() {
+    statusDiv.innerHTML = '<div class="alert alert-danger"><i class="bi bi-exclamation-triangle me-2"></i>Upload failed</div>';
+  };
+  
+  xhr.send(formData);
+}
+
+function clearFiles() {
+  const fileInput = document.getElementById('fileInput');
+  const fileList = document.getElementById('fileList');
+  const uploadBtn = document.getElementById('uploadBtn');
+  
+  fileInput.value = '';
+  fileList.innerHTML = '';
+  uploadBtn.disabled = true;
+}
+
+// Precomputed {el, name, type} for every file element, filled on load
+let fileEntries = [];
+
+// UI preferences, written to localStorage in one batch when the page is idle
+const PREFS = loadPrefs();
+let prefsDirty = false;
+
+function loadPrefs() {
+  let prefs = {};
+  try {
+    prefs = JSON.parse(localStorage.getItem('prefs')) || {};
+  } catch (e) {}
+  // Fall back to the separate keys older versions wrote
+  return {
+    theme: prefs.theme || localStorage.getItem('theme') || 'light',
+    viewMode: prefs.viewMode || localStorage.getItem('viewMode') || 'grid'
+  };
+}
+
+function setPref(key, value) {
+  PREFS[key] = value;
+  if (prefsDirty) return;
+  prefsDirty = true;
+  if ('requestIdleCallback' in window) {
+    requestIdleCallback(savePrefs);
+  } else {
+    setTimeout(savePrefs, 0);
+  }
+}
+
+function savePrefs() {
+  if (!prefsDirty) return;
+  prefsDirty = false;
+  localStorage.setItem('prefs', JSON.stringify(PREFS));
+}
+
+window.addEventListener('pagehide', savePrefs);
+
+// Live collection of file checkboxes and how many of them are checked,
+// kept up to date by the change handlers instead of re-querying the DOM
+let fileCheckboxes = [];
+let checkedCount = 0;
+
+function checkedFilenames() {
+  const filenames = [];
+  for (const cb of fileCheckboxes) {
+    if (cb.checked) filenames.push(cb.value);
+  }
+  return filenames;
+}
+
+function debounce(fn, wait) {
+  let timer = null;
+  return function(...args) {
+    clearTimeout(timer);
+    timer = setTimeout(() => fn.apply(this, args), wait);
+  };
+}
+
+// Large pages are filtered in a worker so typing never waits on the scan
+const FILTER_WORKER_SRC = `
+let items = [];
+onmessage = function(e) {
+  if (e.data.items) {
+    items = e.data.items;
+    return;
+  }
+  const visible = new Uint8Array(items.length);
+  for (let i = 0; i < items.length; i++) {
+    const item = items[i];
+    visible[i] = item.name.includes(e.data.q) && (!e.data.type || item.type === e.data.type) ? 1 : 0;
+  }
+  postMessage({id: e.data.id, visible: visible}, [visible.buffer]);
+};
+`;
+let filterWorker = null;
+let filterRequestId = 0;
+
+function filterWorkerMinEntries() {
+  const grid = document.getElementById('filesGridView');
+  return Number((grid && grid.dataset.workerMinEntries) || Infinity);
+}
+
+function startFilterWorker() {
+  if (fileEntries.length < filterWorkerMinEntries() || !window.Worker) return;
+  try {
+    const url = URL.createObjectURL(new Blob([FILTER_WORKER_SRC], {type: 'application/javascript'}));
+    filterWorker = new Worker(url);
+  } catch (e) {
+    return;
+  }
+  filterWorker.onmessage = function(e) {
+    // Only the newest query's result is applied
+    if (e.data.id === filterRequestId) applyFilter(e.data.visible);
+  };
+  filterWorker.onerror = function() {
+    filterWorker = null;
+    filterFiles();
+  };
+  filterWorker.postMessage({items: fileEntries.map(entry => ({name: entry.name, type: entry.type}))});
+}
+
+function filterFiles() {
+  const searchTerm = document.getElementById('searchInput').value.toLowerCase();
+  const typeFilter = document.getElementById('typeFilter').value;
+  
+  if (filterWorker) {
+    filterWorker.postMessage({id: ++filterRequestId, q: searchTerm, type: typeFilter});
+    return;
+  }
+  
+  // Read pass: decide visibility from the cached entries, no DOM reads
+  const visible = new Uint8Array(fileEntries.length);
+  fileEntries.forEach((entry, i) => {
+    const matchesSearch = entry.name.includes(searchTerm);
+    const matchesType = !typeFilter || entry.type === typeFilter;
+    visible[i] = matchesSearch && matchesType ? 1 : 0;
+  });
+  applyFilter(visible);
+}
+
+function applyFilter(visible) {
+  // Write pass: apply all changes together so layout is recalculated once
+  fileEntries.forEach((entry, i) => entry.el.classList.toggle('filter-hidden', !visible[i]));
+}
+
+// Preview views are queued and reported together in one beacon
+const VIEW_FLUSH_DELAY = 5000;
+let pendingViews = [];
+
+function recordView(filename) {
+  if (!pendingViews.length) setTimeout(flushViews, VIEW_FLUSH_DELAY);
+  pendingViews.push(filename);
+}
+
+function flushViews() {
+  if (!pendingViews.length) return;
+  // A plain string goes as text/plain, which beacons are always allowed to send
+  const body = JSON.stringify({action: 'view', files: pendingViews});
+  if (navigator.sendBeacon && navigator.sendBeacon('/stats', body)) {
+    pendingViews = [];
+    return;
+  }
+  const sent = pendingViews;
+  pendingViews = [];
+  fetch('/stats', {method: 'POST', body: body, keepalive: true})
+    .catch(() => {
+      pendingViews = sent.concat(pendingViews);
+      setTimeout(flushViews, VIEW_FLUSH_DELAY);
+    });
+}
+
+window.addEventListener('pagehide', flushViews);
+
+function previewFile(fileType, url, filename) {
+  const modal = document.getElementById('previewModal');
+  const content = document.getElementById('previewContent');
+  content.innerHTML = '';
+  
+  // Update file stats
+  recordView(filename);
+  
+  if (fileType === 'image') {
+    const img = document.createElement('img');
+    img.src = url;
+    img.className = 'img-fluid';
+    img.style.maxHeight = '90vh';
+    content.appendChild(img);
+  } else if (fileType === 'video') {
+    const video = document.createElement('video');
+    video.src = url;
+    video.controls = true;
+    video.autoplay = true;
+    video.className = 'w-100';
+    video.style.maxHeight = '90vh';
+    content.appendChild(video);
+  } else if (fileType === 'audio') {
+    const audio = document.createElement('audio');
+    audio.src = url;
+    audio.controls = true;
+    audio.autoplay = true;
+    audio.className = 'w-100';
+    content.appendChild(audio);
+  } else if (fileType === 'pdf') {
+    const iframe = document.createElement('iframe');
+    iframe.src = url;
+    iframe.className = 'w-100';
+    iframe.style.height = '90vh';
+    content.appendChild(iframe);
+  }
+  
+  modal.style.display = 'block';
+}
+
+function closePreview() {
+  const modal = document.getElementById('previewModal');
+  const content = document.getElementById('previewContent');
+  modal.style.display = 'none';
+  content.innerHTML = '';
+}
+
+function deleteFile(filename) {
+  if (confirm(`Are you sure you want to delete "${filename}"?`)) {
+    const form = document.getElementById('deleteForm');
+    form.action = '/delete/' + encodeURIComponent(filename);
+    form.submit();
+  }
+}
+
+function updateBulkActions() {
+  const bulkActions = document.getElementById('bulkActions');
+  const selectedCount = document.getElementById('selectedCount');
+  if (!bulkActions) return;
+  
+  if (checkedCount > 0) {
+    bulkActions.classList.remove('d-none');
+    selectedCount.textContent = checkedCount;
+  } else {
+    bulkActions.classList.add('d-none');
+  }
+}
+
+function bulkDelete() {
+  const filenames = checkedFilenames();
+  
+  if (filenames.length === 0) return;
+  
+  if (confirm(`Delete ${filenames.length} selected files?`)) {
+    fetch('/bulk-delete', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({files: filenames})
+    })
+    .then(response => response.json())
+    .then(data => {
+      if (!data.success) {
+        const failures = (data.failed || []).map(f => `${f.filename}: ${f.error}`);
+        alert('Error deleting files: ' + data.message + (failures.length ? '\\n' + failures.join('\\n') : ''));
+      }
+      location.reload();
+    });
+  }
+}
+
+function bulkDownload() {
+  const filenames = checkedFilenames();
+  
+  if (filenames.length === 0) return;
+  
+  // Create form to download files
+  const form = document.createElement('form');
+  form.method = 'POST';
+  form.action = '/bulk-download';
+  
+  filenames.forEach(filename => {
+    const input = document.createElement('input');
+    input.type = 'hidden';
+    input.name = 'files[]';
+    input.value = filename;
+    form.appendChild(input);
+  });
+  
+  document.body.appendChild(form);
+  form.submit();
+  document.body.removeChild(form);
+}
+
+function clearSelection() {
+  for (const cb of fileCheckboxes) {
+    cb.checked = false;
+  }
+  checkedCount = 0;
+  updateBulkActions();
+}
+
+function formatFileSize(bytes) {
+  if (bytes === 0) return '0 Bytes';
+  const k = 1024;
+  const sizes = ['Bytes', 'KB', 'MB', 'GB'];
+  const i = Math.floor(Math.log(bytes) / Math.log(k));
+  return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+}
+
+// Close modal on ESC key
+document.addEventListener('keydown', function(e) {
+  if (e.key === 'Escape') {
+    closePreview();
+  }
+});
+
+// Close modal on click outside
+document.getElementById('previewModal').addEventListener('click', function(e) {
+  if (e.target === this) {
+    closePreview();
+  }
+});
+
+// Notepad functions
+function saveNotepad() {
+    const filename = document.getElementById('notepadFilename').value;
+    if (!filename) {
+        alert('Please enter a filename');
+        return;
     }
-  };
-  
-  xhr.onerror = function() {
-    statusDiv.innerHTML = '<div class="alert alert-danger"><i class="bi bi-exclamation-triangle me-2"></i>Upload failed</div>';
-  };
-  
-  xhr.send(formData);
+    document.getElementById('notepadForm').submit();
 }
 
-function clearFiles() {
-  const fileInput = document.getElementById('fileInput');
-  const fileList = document.getElementById('fileList');
-  const uploadBtn = document.getElementById('uploadBtn');
-  
-  fileInput.value = '';
-  fileList.innerHTML = '';
-  uploadBtn.disabled = true;
+function newNotepad() {
+    document.getElementById('notepadFilename').value = '';
+    document.getElementById('notepadContent').value = '';
 }
 
-function filterFiles() {
-  const searchTerm = document.getElementById('searchInput').value.toLowerCase();
-  const typeFilter = document.getElementById('typeFilter').value;
-  const fileElements = document.querySelectorAll('[data-filename]');
-  
-  fileElements.forEach(element => {
-    const filename = element.dataset.filename.toLowerCase();
-    const filetype = element.dataset.type;
+function loadNotepad(filename) {
+    fetch('/notepad/' + encodeURIComponent(filename))
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                document.getElementById('notepadFilename').value = filename;
+                document.getElementById('notepadContent').value = data.content;
+            } else {
+                alert('Error loading notepad: ' + data.message);
+            }
+        })
+        .catch(error => {
+            alert('Error loading notepad: ' + error);
+        });
+}
+'''
+
+# Enhanced HTML Template
+TEMPLATE = '''
+<!doctype html>
+<html lang="en" data-bs-theme="{{ theme }}">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>Enhanced File Server</title>
+  <link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
+  <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
+  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+  <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+</head>
+<body>
+<div id="previewModal" class="preview-modal">
+  <span class="close-preview" onclick="closePreview()">&times;</span>
+  <div id="previewContent" class="preview-content"></div>
+</div>
+
+<nav class="navbar navbar-expand-lg navbar-dark bg-primary">
+  <div class="container">
+    <a class="navbar-brand" href="#">
+      <i class="bi bi-hdd-network me-2"></i>Enhanced File Server
+    </a>
+    {% if session.logged_in %}
+    <div class="navbar-nav ms-auto d-flex flex-row gap-3">
+      <span class="navbar-text">Welcome, {{ session.username }}</span>
+      <i class="bi bi-moon-fill theme-toggle" id="themeToggle" title="Toggle Theme"></i>
+      {% if session.role == 'admin' %}
+      <a class="nav-link" href="{{ url_for('admin') }}"><i class="bi bi-gear"></i> Admin</a>
+      {% endif %}
+      <a class="nav-link" href="{{ url_for('logout') }}"><i class="bi bi-box-arrow-right"></i> Logout</a>
+      <a class="nav-link" href="{{ url_for('notepad') }}"><i class="bi bi-journal-text"></i> Notepad</a>
+    </div>
+    {% endif %}
+  </div>
+</nav>
+
+<div class="container py-4">
+  {% with messages = get_flashed_messages(with_categories=true) %}
+    {% if messages %}
+      {% for category, message in messages %}
+        <div class="alert alert-{{ 'danger' if category == 'error' else 'success' if category == 'success' else 'info' }} alert-dismissible fade show">
+          {{ message }}
+          <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        </div>
+      {% endfor %}
+    {% endif %}
+  {% endwith %}
+
+  {% if not session.logged_in %}
+    <div class="row justify-content-center">
+      <div class="col-md-4">
+        <div class="card shadow">
+          <div class="card-body">
+            <h4 class="card-title text-center mb-4">
+              <i class="bi bi-shield-lock text-primary"></i> Login
+            </h4>
+            <form method="POST">
+              <div class="mb-3">
+                <label class="form-label">Username</label>
+                <input name="username" class="form-control" required>
+              </div>
+              <div class="mb-3">
+                <label class="form-label">Password</label>
+                <input type="password" name="password" class="form-control" required>
+              </div>
+              <button type="submit" class="btn btn-primary w-100">
+                <i class="bi bi-box-arrow-in-right me-2"></i>Login
+              </button>
+            </form>
+          </div>
+        </div>
+      </div>
+    </div>
     
-    const matchesSearch = filename.includes(searchTerm);
-    const matchesType = !typeFilter || filetype === typeFilter;
+  {% elif page == 'admin' %}
+    <div class="row">
+      <div class="col-12">
+        <h2><i class="bi bi-gear me-2"></i>Admin Panel</h2>
+        
+        <!-- Statistics Cards -->
+        <div class="row mb-4">
+          <div class="col-md-3">
+            <div class="card stats-card">
+              <div class="card-body text-center">
+                <i class="bi bi-files display-4 mb-2"></i>
+                <h3>{{ total_files }}</h3>
+                <p class="mb-0">Total Files</p>
+              </div>
+            </div>
+          </div>
+          <div class="col-md-3">
+            <div class="card stats-card">
+              <div class="card-body text-center">
+                <i class="bi bi-download display-4 mb-2"></i>
+                <h3>{{ total_downloads }}</h3>
+                <p class="mb-0">Downloads</p>
+              </div>
+            </div>
+          </div>
+          <div class="col-md-3">
+            <div class="card stats-card">
+              <div class="card-body text-center">
+                <i class="bi bi-people display-4 mb-2"></i>
+                <h3>{{ total_users }}</h3>
+                <p class="mb-0">Users</p>
+              </div>
+            </div>
+          </div>
+          <div class="col-md-3">
+            <div class="card stats-card">
+              <div class="card-body text-center">
+                <i class="bi bi-hdd display-4 mb-2"></i>
+                <h3>{{ disk_usage }}</h3>
+                <p class="mb-0">Disk Usage</p>
+              </div>
+            </div>
+          </div>
+        </div>
+        
+        <!-- User Management -->
+        <div class="card mb-4">
+          <div class="card-header">
+            <h5><i class="bi bi-people me-2"></i>User Management</h5>
+          </div>
+          <div class="card-body">
+            <form method="POST" action="{{ url_for('admin') }}" class="row g-3 mb-3">
+              <div class="col-md-4">
+                <label class="form-label">Username</label>
+                <input type="text" name="new_username" class="form-control" required>
+              </div>
+              <div class="col-md-4">
+                <label class="form-label">Password</label>
+                <input type="password" name="new_password" class="form-control" required>
+              </div>
+              <div class="col-md-2">
+                <label class="form-label">Role</label>
+                <select name="new_role" class="form-select">
+                  <option value="user">User</option>
+                  <option value="admin">Admin</option>
+                </select>
+              </div>
+              <div class="col-md-2 d-flex align-items-end">
+                <button type="submit" name="action" value="add_user" class="btn btn-success">
+                  <i class="bi bi-person-plus"></i> Add User
+                </button>
+              </div>
+            </form>
+            
+            <form method="POST" action="{{ url_for('admin') }}" enctype="multipart/form-data" class="row g-3 mb-3">
+              <div class="col-md-10">
+                <label class="form-label">Import users from CSV (username,password[,role])</label>
+                <input type="file" name="users_csv" accept=".csv,text/csv" class="form-control" required>
+              </div>
+              <div class="col-md-2 d-flex align-items-end">
+                <button type="submit" name="action" value="bulk_add_users" class="btn btn-outline-success">
+                  <i class="bi bi-people"></i> Import
+                </button>
+              </div>
+            </form>
+            
+            <div class="table-responsive">
+              <table class="table table-hover">
+                <thead>
+                  <tr>
+                    <th>Username</th>
+                    <th>Role</th>
+                    <th>Created</th>
+                    <th>Actions</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {% for username, role, created, badge, deletable in user_rows %}
+                  <tr>
+                    <td>{{ username }}</td>
+                    <td><span class="badge bg-{{ badge }}">{{ role }}</span></td>
+                    <td>{{ created }}</td>
+                    <td>
+                      {% if deletable %}
+                      <form method="POST" action="{{ url_for('admin') }}" class="d-inline">
+                        <input type="hidden" name="username" value="{{ username }}">
+                        <button type="submit" name="action" value="delete_user" class="btn btn-sm btn-danger" 
+                                onclick="return confirm('Delete user {{ username }}?')">
+                          <i class="bi bi-trash"></i>
+                        </button>
+                      </form>
+                      {% endif %}
+                    </td>
+                  </tr>
+                  {% endfor %}
+                </tbody>
+              </table>
+            </div>
+          </div>
+        </div>
+        
+        <!-- File Statistics -->
+        <div class="card">
+          <div class="card-header">
+            <h5><i class="bi bi-bar-chart me-2"></i>File Statistics</h5>
+          </div>
+          <div class="card-body">
+            <div class="table-responsive">
+              <table class="table table-hover">
+                <thead>
+                  <tr>
+                    <th>File</th>
+                    <th>Downloads</th>
+                    <th>Views</th>
+                    <th>Uploaded</th>
+                    <th>Last Accessed</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {% for filename, downloads, views, uploaded, last_accessed in stats_rows %}
+                  <tr>
+                    <td>{{ filename }}</td>
+                    <td><span class="badge bg-primary">{{ downloads }}</span></td>
+                    <td><span class="badge bg-info">{{ views }}</span></td>
+                    <td>{{ uploaded }}</td>
+                    <td>{{ last_accessed }}</td>
+                  </tr>
+                  {% endfor %}
+                </tbody>
+              </table>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
     
-    if (matchesSearch && matchesType) {
-      element.style.display = '';
-    } else {
-      element.style.display = 'none';
-    }
-  });
-}
-
-function previewFile(fileType, url, filename) {
-  const modal = document.getElementById('previewModal');
-  const content = document.getElementById('previewContent');
-  content.innerHTML = '';
-  
-  // Update file stats
-  fetch(`/stats/${encodeURIComponent(filename)}`, {
-    method: 'POST',
-    headers: {'Content-Type': 'application/json'},
-    body: JSON.stringify({action: 'view'})
-  });
-  
-  if (fileType === 'image') {
-    const img = document.createElement('img');
-    img.src = url;
-    img.className = 'img-fluid';
-    img.style.maxHeight = '90vh';
-    content.appendChild(img);
-  } else if (fileType === 'video') {
-    const video = document.createElement('video');
-    video.src = url;
-    video.controls = true;
-    video.autoplay = true;
-    video.className = 'w-100';
-    video.style.maxHeight = '90vh';
-    content.appendChild(video);
-  } else if (fileType === 'audio') {
-    const audio = document.createElement('audio');
-    audio.src = url;
-    audio.controls = true;
-    audio.autoplay = true;
-    audio.className = 'w-100';
-    content.appendChild(audio);
-  } else if (fileType === 'pdf') {
-    const iframe = document.createElement('iframe');
-    iframe.src = url;
-    iframe.className = 'w-100';
-    iframe.style.height = '90vh';
-    content.appendChild(iframe);
-  }
-  
-  modal.style.display = 'block';
-}
-
-function closePreview() {
-  const modal = document.getElementById('previewModal');
-  const content = document.getElementById('previewContent');
-  modal.style.display = 'none';
-  content.innerHTML = '';
-}
-
-function deleteFile(filename) {
-  if (confirm(`Are you sure you want to delete "${filename}"?`)) {
-    const form = document.getElementById('deleteForm');
-    form.action = '/delete/' + encodeURIComponent(filename);
-    form.submit();
-  }
-}
+  {% elif page == 'notepad' %}
+    <div class="row">
+      <div class="col-12">
+        <div class="card mb-4">
+          <div class="card-header d-flex justify-content-between align-items-center">
+            <h5 class="mb-0"><i class="bi bi-journal-text me-2"></i>Notepad</h5>
+            <div class="btn-group">
+              <button class="btn btn-primary" onclick="saveNotepad()">
+                <i class="bi bi-save me-2"></i>Save
+              </button>
+              <button class="btn btn-outline-secondary" onclick="newNotepad()">
+                <i class="bi bi-file-earmark-plus me-2"></i>New
+              </button>
+            </div>
+          </div>
+          <div class="card-body">
+            <div class="row">
+              <div class="col-md-3">
+                <div class="list-group mb-3">
+                  <div class="list-group-item list-group-item-action active">
+                    <i class="bi bi-journal-text me-2"></i>My Notes
+                  </div>
+                  {% for file in notepad_files %}
+                  <a href="#" class="list-group-item list-group-item-action" onclick="loadNotepad('{{ file.name }}')">
+                    <div class="d-flex justify-content-between align-items-center">
+                      <span><i class="bi bi-file-text me-2"></i>{{ file.name }}</span>
+                      <small class="text-muted">{{ file.modified }}</small>
+                    </div>
+                  </a>
+                  {% endfor %}
+                </div>
+              </div>
+              <div class="col-md-9">
+                <form id="notepadForm" method="POST">
+                  <div class="mb-3">
+                    <input type="text" class="form-control" id="notepadFilename" name="filename" placeholder="Enter filename (e.g., mynote.txt)" required>
+                  </div>
+                  <textarea class="form-control" id="notepadContent" name="content" rows="20" style="resize: none; font-family: monospace;"></textarea>
+                </form>
+              </div>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+  {% else %}
+    <!-- File Management Interface -->
+    <div class="row">
+      <div class="col-12">
+        <!-- Upload Section -->
+        <div class="card mb-4">
+          <div class="card-body">
+            <h5 class="card-title"><i class="bi bi-cloud-upload me-2"></i>Upload Files</h5>
+            <form id="uploadForm" method="POST" enctype="multipart/form-data" action="/upload">
+              <div class="drop-zone mb-3" id="dropZone">
+                <i class="bi bi-cloud-upload display-4 text-muted mb-2"></i>
+                <p class="mb-2">Drag & drop files here or click to browse</p>
+                <p class="text-muted small">Maximum file size: {{ max_file_size }}</p>
+                <input type="file" id="fileInput" name="files" class="d-none" multiple>
+              </div>
+              
+              <div id="fileList" class="mb-3"></div>
+              
+              <div class="progress mb-3 d-none" id="uploadProgress">
+                <div class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: 0%"></div>
+              </div>
+              
+              <div id="uploadStatus" class="mb-3"></div>
+              
+              <div class="d-flex gap-2">
+                <button class="btn btn-success" type="submit" id="uploadBtn" disabled>
+                  <i class="bi bi-cloud-upload me-2"></i>Upload Files
+                </button>
+                <button class="btn btn-outline-secondary" type="button" id="clearBtn" onclick="clearFiles()">
+                  <i class="bi bi-x-circle me-2"></i>Clear
+                </button>
+              </div>
+            </form>
+          </div>
+        </div>
+        
+        <!-- Search and Filter -->
+        <div class="card mb-4">
+          <div class="card-body">
+            {% set paginated = total_pages|default(1) > 1 or search_query or type_filter %}
+            <form class="row g-3" id="filterForm" method="get" action="{{ url_for('files') }}"{{ ' data-paginated="1"'|safe if paginated }}>
+              {% if per_page is defined and per_page != default_per_page %}
+              <input type="hidden" name="per_page" value="{{ per_page }}">
+              {% endif %}
+              <div class="col-md-6">
+                <div class="search-container">
+                  <i class="bi bi-search"></i>
+                  <input type="text" id="searchInput" name="q" value="{{ search_query }}" class="form-control search-input"
+                         placeholder="{{ 'Search files... (Enter searches all pages)' if paginated else 'Search files...' }}">
+                </div>
+              </div>
+              <div class="col-md-3">
+                <select id="typeFilter" name="type" class="form-select">
+                  {% for value, label in [('', 'All Types'), ('image', 'Images'), ('video', 'Videos'), ('audio', 'Audio'), ('pdf', 'PDFs'), ('text', 'Text'), ('other', 'Other')] %}
+                  <option value="{{ value }}"{{ ' selected'|safe if value == type_filter }}>{{ label }}</option>
+                  {% endfor %}
+                </select>
+              </div>
+              <div class="col-md-3">
+                <div class="btn-group w-100" role="group">
+                  <button type="button" class="btn btn-outline-primary active" id="gridView">
+                    <i class="bi bi-grid"></i>
+                  </button>
+                  <button type="button" class="btn btn-outline-primary" id="listView">
+                    <i class="bi bi-list"></i>
+                  </button>
+                </div>
+              </div>
+            </form>
+          </div>
+        </div>
+        
+        <!-- Bulk Actions -->
+        <div class="card mb-4 d-none" id="bulkActions">
+          <div class="card-body">
+            <div class="d-flex align-items-center gap-3">
+              <span><span id="selectedCount">0</span> files selected</span>
+              <button class="btn btn-danger btn-sm" onclick="bulkDelete()">
+                <i class="bi bi-trash me-2"></i>Delete Selected
+              </button>
+              <button class="btn btn-primary btn-sm" onclick="bulkDownload()">
+                <i class="bi bi-download me-2"></i>Download Selected
+              </button>
+              <button class="btn btn-outline-secondary btn-sm" onclick="clearSelection()">
+                <i class="bi bi-x me-2"></i>Clear Selection
+              </button>
+            </div>
+          </div>
+        </div>
+        
+        <!-- Files Display -->
+        <div class="card">
+          <div class="card-body">
+            <div id="filesGridView" class="file-grid" data-worker-min-entries="{{ filter_worker_min_entries }}">
+              {% for file in files %}
+                <div class="file-card" data-filename="{{ file.name }}" data-type="{{ file.type }}">
+                  <div class="d-flex justify-content-between align-items-start mb-2">
+                    <div class="form-check">
+                      <input class="form-check-input file-checkbox" type="checkbox" value="{{ file.name }}">
+                    </div>
+                    <span class="badge badge-file-type bg-{{ file.meta.badge }}">
+                      {{ file.type }}
+                    </span>
+                  </div>
+                  
+                  <div class="text-center mb-3">
+                    <i class="bi {{ file.meta.icon_class }}" style="font-size: 3rem;"></i>
+                  </div>
+                  
+                  <h6 class="card-title text-truncate" title="{{ file.name }}">{{ file.name }}</h6>
+                  <p class="card-text small text-muted">
+                    Size: {{ file.size }}<br>
+                    Modified: {{ file.modified }}<br>
+                    {% if file.name in file_stats %}
+                    Downloads: {{ file_stats[file.name].downloads | default(0) }}
+                    {% endif %}
+                  </p>
+                  
+                  <div class="btn-group w-100" role="group">
+                    {% if file.meta.previewable %}
+                    <button class="btn btn-sm btn-info" data-action="preview" data-src="{{ raw_prefix }}{{ file.name | urlencode }}">
+                      <i class="bi bi-eye"></i>
+                    </button>
+                    {% endif %}
+                    <a href="{{ download_prefix }}{{ file.name | urlencode }}" class="btn btn-sm btn-primary">
+                      <i class="bi bi-download"></i>
+                    </a>
+                    <button class="btn btn-sm btn-danger" data-action="delete">
+                      <i class="bi bi-trash"></i>
+                    </button>
+                  </div>
+                </div>
+              {% endfor %}
+              {% if not files %}
+                <div class="col-12 text-center py-5">
+                  <i class="bi bi-inbox display-4 text-muted mb-3"></i>
+                  <h5 class="text-muted">No files found</h5>
+                  <p class="text-muted">Upload some files to get started</p>
+                </div>
+              {% endif %}
+            </div>
+            
+            <!-- List View (Hidden by default) -->
+            <div id="filesListView" class="d-none">
+              <div class="table-responsive">
+                <table class="table table-hover">
+                  <thead>
+                    <tr>
+                      <th width="40">
+                        <input type="checkbox" id="selectAll" class="form-check-input">
+                      </th>
+                      <th>Type</th>
+                      <th>Filename</th>
+                      <th>Size</th>
+                      <th>Modified</th>
+                      <th>Stats</th>
+                      <th>Actions</th>
+                    </tr>
+                  </thead>
+                  <tbody>
+                    {% for file in files %}
+                      <tr data-filename="{{ file.name }}" data-type="{{ file.type }}">
+                        <td>
+                          <input class="form-check-input file-checkbox" type="checkbox" value="{{ file.name }}">
+                        </td>
+                        <td>
+                          <i class="bi {{ file.meta.icon_class }} file-icon"></i>
+                        </td>
+                        <td>
+                          {% if file.meta.previewable %}
+                            <a href="#" data-action="preview" data-src="{{ raw_prefix }}{{ file.name | urlencode }}">{{ file.name }}</a>
+                          {% else %}
+                            {{ file.name }}
+                          {% endif %}
+                        </td>
+                        <td>{{ file.size }}</td>
+                        <td>{{ file.modified }}</td>
+                        <td>
+                          {% if file.name in file_stats %}
+                          <small>
+                            <i class="bi bi-download me-1"></i>{{ file_stats[file.name].downloads | default(0) }}
+                            <i class="bi bi-eye ms-2 me-1"></i>{{ file_stats[file.name].views | default(0) }}
+                          </small>
+                          {% else %}
+                          <small class="text-muted">No data</small>
+                          {% endif %}
+                        </td>
+                        <td>
+                          <div class="btn-group" role="group">
+                            {% if file.meta.previewable %}
+                            <button class="btn btn-sm btn-info" data-action="preview" data-src="{{ raw_prefix }}{{ file.name | urlencode }}">
+                              <i class="bi bi-eye"></i>
+                            </button>
+                            {% endif %}
+                            <a href="{{ download_prefix }}{{ file.name | urlencode }}" class="btn btn-sm btn-primary">
+                              <i class="bi bi-download"></i>
+                            </a>
+                            <button class="btn btn-sm btn-danger" data-action="delete">
+                              <i class="bi bi-trash"></i>
+                            </button>
+                          </div>
+                        </td>
+                      </tr>
+                    {% endfor %}
+                  </tbody>
+                </table>
+              </div>
+            </div>
+          </div>
+        </div>
+        
+        <!-- Pagination -->
+        {% if total_pages|default(1) > 1 %}
+        <nav class="mt-3">
+          <ul class="pagination justify-content-center">
+            <li class="page-item {{ 'disabled' if page_number == 1 }}">
+              <a class="page-link" href="{{ url_for('files', page=page_number - 1, per_page=per_page, q=search_query or None, type=type_filter or None) }}">Previous</a>
+            </li>
+            <li class="page-item disabled">
+              <span class="page-link">Page {{ page_number }} of {{ total_pages }} ({{ total_file_count }} files)</span>
+            </li>
+            <li class="page-item {{ 'disabled' if page_number == total_pages }}">
+              <a class="page-link" href="{{ url_for('files', page=page_number + 1, per_page=per_page, q=search_query or None, type=type_filter or None) }}">Next</a>
+            </li>
+          </ul>
+        </nav>
+        {% endif %}
+      </div>
+    </div>
+  {% endif %}
+</div>
 
-function updateBulkActions() {
-  const checkboxes = document.querySelectorAll('.file-checkbox:checked');
-  const bulkActions = document.getElementById('bulkActions');
-  const selectedCount = document.getElementById('selectedCount');
-  
-  if (checkboxes.length > 0) {
-    bulkActions.classList.remove('d-none');
-    selectedCount.textContent = checkboxes.length;
-  } else {
-    bulkActions.classList.add('d-none');
-  }
-}
+<!-- Hidden forms -->
+<form id="deleteForm" method="POST" style="display:none;"></form>
 
-function bulkDelete() {
-  const checkboxes = document.querySelectorAll('.file-checkbox:checked');
-  const filenames = Array.from(checkboxes).map(cb => cb.value);
-  
-  if (filenames.length === 0) return;
-  
-  if (confirm(`Delete ${filenames.length} selected files?`)) {
-    fetch('/bulk-delete', {
-      method: 'POST',
-      headers: {'Content-Type': 'application/json'},
-      body: JSON.stringify({files: filenames})
-    })
-    .then(response => response.json())
-    .then(data => {
-      if (data.success) {
-        location.reload();
-      } else {
-        alert('Error deleting files: ' + data.message);
-      }
-    });
-  }
-}
+<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js" defer></script>
+<script src="{{ asset_url('app.js') }}" defer></script>
+</body>
+</html>
+'''
 
-function bulkDownload() {
-  const checkboxes = document.querySelectorAll('.file-checkbox:checked');
-  const filenames = Array.from(checkboxes).map(cb => cb.value);
-  
-  if (filenames.length === 0) return;
-  
-  // Create form to download files
-  const form = document.createElement('form');
-  form.method = 'POST';
-  form.action = '/bulk-download';
-  
-  filenames.forEach(filename => {
-    const input = document.createElement('input');
-    input.type = 'hidden';
-    input.name = 'files[]';
-    input.value = filename;
-    form.appendChild(input);
-  });
-  
-  document.body.appendChild(form);
-  form.submit();
-  document.body.removeChild(form);
-}
+# Templates are inline strings, so there are no files to watch for changes
+app.config['TEMPLATES_AUTO_RELOAD'] = False
+app.jinja_env.auto_reload = False
 
-function clearSelection() {
-  const checkboxes = document.querySelectorAll('.file-checkbox');
-  checkboxes.forEach(cb => cb.checked = false);
-  updateBulkActions();
-}
+# Content-hash versioned so browsers can cache them indefinitely
+def _page_asset(body, mimetype):
+    data = body.encode('utf-8')
+    return {'data': data, 'mimetype': mimetype, 'etag': _new_file_digest(data).hexdigest()}
 
-function formatFileSize(bytes) {
-  if (bytes === 0) return '0 Bytes';
-  const k = 1024;
-  const sizes = ['Bytes', 'KB', 'MB', 'GB'];
-  const i = Math.floor(Math.log(bytes) / Math.log(k));
-  return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+PAGE_ASSETS = {
+    'app.css': _page_asset(PAGE_CSS, 'text/css'),
+    'app.js': _page_asset(PAGE_JS, 'application/javascript'),
 }
 
-// Close modal on ESC key
-document.addEventListener('keydown', function(e) {
-  if (e.key === 'Escape') {
-    closePreview();
-  }
-});
-
-// Close modal on click outside
-document.getElementById('previewModal').addEventListener('click', function(e) {
-  if (e.target === this) {
-    closePreview();
-  }
-});
-
-// Notepad functions
-function saveNotepad() {
-    const filename = document.getElementById('notepadFilename').value;
-    if (!filename) {
-        alert('Please enter a filename');
-        return;
-    }
-    document.getElementById('notepadForm').submit();
-}
+@app.template_global()
+def asset_url(name):
+    return url_for('page_asset', name=name, v=PAGE_ASSETS[name]['etag'])
 
-function newNotepad() {
-    document.getElementById('notepadFilename').value = '';
-    document.getElementById('notepadContent').value = '';
-}
+# Parse and compile the page template once instead of on every request
+COMPILED_TEMPLATE = app.jinja_env.from_string(TEMPLATE)
 
-function loadNotepad(filename) {
-    fetch('/notepad/' + encodeURIComponent(filename))
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                document.getElementById('notepadFilename').value = filename;
-                document.getElementById('notepadContent').value = data.content;
-            } else {
-                alert('Error loading notepad: ' + data.message);
-            }
-        })
-        .catch(error => {
-            alert('Error loading notepad: ' + error);
-        });
-}
-</script>
-</body>
-</html>
-'''
+ERROR_TEMPLATE = app.jinja_env.from_string('''
+    <div class="container mt-5">
+        <div class="text-center">
+            <h1>{{ title }}</h1>
+            <p>{{ message }}</p>
+            <a href="{{ url_for('files') }}" class="btn btn-primary">Go Home</a>
+        </div>
+    </div>
+    ''')
 
-def get_file_type(filename):
-    """Determine file type for UI display"""
-    mime, _ = mimetypes.guess_type(filename)
+def _type_from_mime(mime):
     if mime:
         if mime.startswith('image/'):
             return 'image'
@@ -1190,61 +1767,232 @@ def get_file_type(filename):
             return 'text'
     return 'other'
 
+# Icon, badge colour and preview support per UI type
+FILE_TYPE_META = {
+    'image': {'icon_class': 'bi-file-image text-primary', 'badge': 'primary', 'previewable': True},
+    'video': {'icon_class': 'bi-file-play text-danger', 'badge': 'danger', 'previewable': True},
+    'audio': {'icon_class': 'bi-file-music text-success', 'badge': 'success', 'previewable': True},
+    'pdf': {'icon_class': 'bi-file-pdf text-danger', 'badge': 'warning', 'previewable': True},
+    'text': {'icon_class': 'bi-file-text text-secondary', 'badge': 'secondary', 'previewable': False},
+    'other': {'icon_class': 'bi-file-earmark', 'badge': 'secondary', 'previewable': False},
+}
+
+# Extension -> UI type for common files; other extensions are resolved
+# through mimetypes once and remembered
+EXT_TYPE = {
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image',
+    'mp4': 'video', 'mkv': 'video', 'webm': 'video', 'mov': 'video',
+    'mp3': 'audio', 'wav': 'audio', 'flac': 'audio', 'ogg': 'audio',
+    'pdf': 'pdf',
+    'txt': 'text', 'md': 'text', 'csv': 'text', 'log': 'text',
+}
+
+def get_file_type(filename):
+    """Determine file type for UI display"""
+    ext = filename.rpartition('.')[2].lower() if '.' in filename else ''
+    file_type = EXT_TYPE.get(ext)
+    if file_type is None:
+        file_type = EXT_TYPE[ext] = _type_from_mime(mimetypes.guess_type('file.' + ext)[0])
+    return file_type
+
+# Files the server itself uses, never listed
+SYSTEM_FILES = frozenset({'server_config.json', 'users.json', 'file_stats.json'})
+SYSTEM_EXTENSIONS = frozenset({'py', 'pyc', 'bat', 'log'})
+
+# Directory scan cached against the folder's mtime; uploads that overwrite
+# an existing file don't touch the folder mtime, so those paths invalidate it
+_file_list_cache = {'mtime': None, 'files': None}
+
+# Per-file entries keyed by name, reused while (mtime, size) is unchanged
+_file_entry_cache = {}
+
+def invalidate_file_list_cache():
+    _file_list_cache['mtime'] = None
+
 def get_file_list():
     """Get list of files with metadata"""
+    try:
+        mtime = os.stat(UPLOAD_FOLDER).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime is not None and mtime == _file_list_cache['mtime']:
+        return _file_list_cache['files']
+    
+    global _file_entry_cache
     files = []
+    entry_cache = {}
     try:
-        for filename in os.listdir(UPLOAD_FOLDER):
-            path = os.path.join(UPLOAD_FOLDER, filename)
-            # Skip system files
-            if os.path.isfile(path) and not filename.startswith('.') and \
-               filename not in ['server_config.json', 'users.json', 'file_stats.json'] and \
-               not filename.endswith('.py') and \
-               not filename.endswith('.pyc') and \
-               not filename.endswith('.bat') and \
-               not filename.endswith('.log'):
-                
-                size = os.path.getsize(path)
-                size_str = format_file_size(size)
-                modified = datetime.datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
-                
-                files.append({
-                    'name': filename,
-                    'size': size_str,
-                    'modified': modified,
-                    'type': get_file_type(filename)
-                })
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            for entry in entries:
+                filename = entry.name
+                # Skip system files
+                if not filename.startswith('.') and \
+                   filename not in SYSTEM_FILES and \
+                   os.path.splitext(filename)[1][1:] not in SYSTEM_EXTENSIONS and \
+                   entry.is_file():
+                    
+                    st = entry.stat()
+                    version = (st.st_mtime_ns, st.st_size)
+                    cached = _file_entry_cache.get(filename)
+                    if cached is not None and cached[0] == version:
+                        file_info = cached[1]
+                    else:
+                        size_str = format_file_size(st.st_size)
+                        modified = datetime.datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                        
+                        file_type = get_file_type(filename)
+                        file_info = {
+                            'name': filename,
+                            'size': size_str,
+                            'modified': modified,
+                            'type': file_type,
+                            'meta': FILE_TYPE_META.get(file_type, FILE_TYPE_META['other'])
+                        }
+                    entry_cache[filename] = (version, file_info)
+                    files.append(file_info)
         
+        _file_entry_cache = entry_cache
         logger.info(f"Found {len(files)} files to display")
     except Exception as e:
         logger.error(f"Error listing files: {e}")
-        
-    return sorted(files, key=lambda x: x['name'].lower())
+    
+    files.sort(key=lambda x: x['name'].lower())
+    _file_list_cache['mtime'] = mtime
+    _file_list_cache['files'] = files
+    return files
 
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+@lru_cache(maxsize=4096)
 def format_file_size(size_bytes):
     """Format file size in human readable format"""
     if size_bytes == 0:
         return "0 B"
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    return f"{size_bytes:.2f} {size_names[i]}"
+    # Unit index straight from the bit length: every 10 bits is one step of 1024
+    size_bytes = int(size_bytes)
+    i = min((size_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (i * 10)):.2f} {SIZE_UNITS[i]}"
 
 def get_disk_usage():
     """Get disk usage statistics"""
     try:
-        total_size = 0
-        for filename in os.listdir(UPLOAD_FOLDER):
-            path = os.path.join(UPLOAD_FOLDER, filename)
-            if os.path.isfile(path):
-                total_size += os.path.getsize(path)
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            total_size = sum(entry.stat().st_size for entry in entries if entry.is_file())
         return format_file_size(total_size)
     except Exception as e:
         logger.error(f"Error calculating disk usage: {e}")
         return "Unknown"
 
+def file_etag(path):
+    """Validator from the file's mtime, size and inode; no file content is read"""
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+
+def stored_content_hash(filename, filepath):
+    """Content hash recorded at upload, if the file hasn't changed since"""
+    content = STATS_STORE.data.get(filename, {}).get('content')
+    if not content:
+        return None
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    if (st.st_size, st.st_mtime_ns) != (content['size'], content['mtime_ns']):
+        return None
+    return content['hash']
+
+def stream_hash(stream):
+    """Content hash of an uploaded stream, leaving it rewound"""
+    digest = _new_file_digest()
+    for chunk in iter(partial(stream.read, 1024 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def clean_upload_name(raw_name):
+    """On-disk name for a client-supplied filename, or None if it can't be stored"""
+    # Some browsers send the full client path; Unicode names are kept as-is
+    name = os.path.basename(raw_name.replace('\\', '/')).strip()
+    if not name or name == '..' or name.startswith('.') or '\0' in name:
+        return None
+    if name in SYSTEM_FILES or safe_join(UPLOAD_FOLDER, name) is None:
+        return None
+    return name
+
+def save_upload(stream, filepath):
+    """Write an upload to disk, hashing it on the way; returns the content hash"""
+    # Written to a hidden temp file and renamed, so an interrupted save never
+    # truncates the existing file
+    digest = _new_file_digest()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            stream.seek(0)
+            for chunk in iter(partial(stream.read, UPLOAD_BUFFER_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+def upload_path(filename):
+    """Path of a user-visible file in UPLOAD_FOLDER, or None for hidden, system or escaping names"""
+    # Hidden parts cover DATA_FOLDER and in-progress temp files
+    if filename in SYSTEM_FILES or any(part.startswith('.') for part in filename.split('/')):
+        return None
+    return safe_join(UPLOAD_FOLDER, filename)
+
+def send_upload(filename, **kwargs):
+    """send_from_directory with a stat-based ETag"""
+    path = upload_path(filename)
+    if path is None:
+        abort(404)
+    if SENDFILE_MODE:
+        # The proxy answers Range and conditional requests itself
+        response = send_from_directory(UPLOAD_FOLDER, filename, conditional=False, etag=False, **kwargs)
+        if SENDFILE_MODE == 'x-accel-redirect':
+            del response.headers['X-Sendfile']
+            response.headers['X-Accel-Redirect'] = quote(SENDFILE_PREFIX + filename)
+        return response
+    etag = file_etag(path) if os.path.isfile(path) else True
+    return send_from_directory(UPLOAD_FOLDER, filename, conditional=True, etag=etag, **kwargs)
+
+def url_prefix(endpoint):
+    """URL of a <path:filename> endpoint with the filename left off"""
+    return url_for(endpoint, filename='__X__')[:-len('__X__')]
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink that hands zipfile output to a streaming response"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+@app.route('/assets/<name>')
+def page_asset(name):
+    """Serve the page stylesheet or script"""
+    asset = PAGE_ASSETS.get(name)
+    if asset is None:
+        abort(404)
+    response = make_response(asset['data'])
+    response.mimetype = asset['mimetype']
+    response.set_etag(asset['etag'])
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
 @app.route('/', methods=['GET', 'POST'])
 def login():
     """Handle login requests"""
@@ -1252,7 +2000,13 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
+        users = USERS_STORE.data
         if username in users and verify_password(password, users[username]['password_hash']):
+            if password_needs_rehash(users[username]['password_hash']):
+                new_hash = hash_password(password)
+                USERS_STORE.mutate(lambda users: users[username].update(password_hash=new_hash))
+                USERS_STORE.flush()
+                logger.info(f"Upgraded password hash for user {username}")
             session['logged_in'] = True
             session['username'] = username
             session['role'] = users[username]['role']
@@ -1263,21 +2017,56 @@ def login():
             logger.warning(f"Failed login attempt for username: {username}")
             flash('Invalid username or password', 'error')
     
-    return render_template_string(TEMPLATE, session=session, theme=config.get('theme', 'light'))
+    return render_template(COMPILED_TEMPLATE, session=session, theme=CONFIG_STORE.data.get('theme', 'light'))
 
 @app.route('/files')
 @login_required
 def files():
     """File listing page"""
     files_list = get_file_list()
-    return render_template_string(
-        TEMPLATE, 
+    
+    # Search and type filters apply to the whole listing, before paging
+    search_query = request.args.get('q', '').strip()
+    type_filter = request.args.get('type', '')
+    if search_query or type_filter:
+        needle = search_query.lower()
+        files_list = [
+            file for file in files_list
+            if needle in file['name'].lower() and (not type_filter or file['type'] == type_filter)
+        ]
+    
+    # Render one page of files at a time
+    per_page = min(max(request.args.get('per_page', FILES_PER_PAGE, type=int), 1), MAX_FILES_PER_PAGE)
+    total_pages = max((len(files_list) + per_page - 1) // per_page, 1)
+    page_number = min(max(request.args.get('page', 1, type=int), 1), total_pages)
+    page_files = files_list[(page_number - 1) * per_page:page_number * per_page]
+    
+    rendered = render_template(
+        COMPILED_TEMPLATE,
         session=session, 
-        files=files_list, 
-        file_stats=file_stats,
-        max_file_size=format_file_size(config.get('max_file_size', 100*1024*1024)),
-        theme=config.get('theme', 'light')
+        files=page_files, 
+        page_number=page_number,
+        per_page=per_page,
+        default_per_page=FILES_PER_PAGE,
+        filter_worker_min_entries=FILTER_WORKER_MIN_ENTRIES,
+        search_query=search_query,
+        type_filter=type_filter,
+        total_pages=total_pages,
+        total_file_count=len(files_list),
+        file_stats=STATS_STORE.data,
+        raw_prefix=url_prefix('files_raw'),
+        download_prefix=url_prefix('download'),
+        max_file_size=format_file_size(CONFIG_STORE.data.get('max_file_size', 100*1024*1024)),
+        theme=CONFIG_STORE.data.get('theme', 'light')
     )
+    
+    # Content-hash ETag lets unchanged refreshes return 304
+    response = make_response(rendered)
+    digest = _new_file_digest()
+    digest.update(rendered.encode('utf-8'))
+    response.set_etag(digest.hexdigest())
+    response.headers['Cache-Control'] = 'private, must-revalidate'
+    return response.make_conditional(request)
 
 @app.route('/admin')
 @admin_required
@@ -1285,21 +2074,36 @@ def admin():
     """Admin panel"""
     # Calculate statistics
     total_files = len(get_file_list())
+    users = USERS_STORE.data
+    file_stats = STATS_STORE.data
     total_downloads = sum(stats.get('downloads', 0) for stats in file_stats.values())
     total_users = len(users)
     disk_usage = get_disk_usage()
     
-    return render_template_string(
-        TEMPLATE,
+    # Flatten rows here so the template does no string work per row
+    user_rows = [
+        (username, user['role'], user['created'].split('T')[0],
+         'danger' if user['role'] == 'admin' else 'primary', username != 'admin')
+        for username, user in users.items()
+    ]
+    stats_rows = [
+        (filename, stats.get('downloads', 0), stats.get('views', 0),
+         stats['uploaded'].split('T')[0] if stats.get('uploaded') else 'Unknown',
+         stats['last_accessed'].split('T')[0] if stats.get('last_accessed') else 'Never')
+        for filename, stats in file_stats.items()
+    ]
+    
+    return render_template(
+        COMPILED_TEMPLATE,
         session=session,
         page='admin',
-        users=users,
-        file_stats=file_stats,
+        user_rows=user_rows,
+        stats_rows=stats_rows,
         total_files=total_files,
         total_downloads=total_downloads,
         total_users=total_users,
         disk_usage=disk_usage,
-        theme=config.get('theme', 'light')
+        theme=CONFIG_STORE.data.get('theme', 'light')
     )
 
 @app.route('/admin', methods=['POST'])
@@ -1314,13 +2118,14 @@ def admin_actions():
         role = request.form.get('new_role', 'user')
         
         if username and password:
-            if username not in users:
-                users[username] = {
+            if username not in USERS_STORE.data:
+                user = {
                     'password_hash': hash_password(password),
                     'role': role,
-                    'created': datetime.datetime.now().isoformat()
+                    'created': now_iso()
                 }
-                save_json_file(USERS_FILE, users)
+                USERS_STORE.mutate(lambda users: users.setdefault(username, user))
+                USERS_STORE.flush()
                 logger.info(f"User {username} created by {session['username']}")
                 flash(f'User {username} created successfully', 'success')
             else:
@@ -1328,11 +2133,29 @@ def admin_actions():
         else:
             flash('Username and password required', 'error')
     
+    elif action == 'bulk_add_users':
+        csv_file = request.files.get('users_csv')
+        if csv_file and csv_file.filename:
+            try:
+                rows = csv.reader(io.StringIO(csv_file.read().decode('utf-8-sig')))
+                entries = [(row[0].strip(), row[1], row[2].strip() if len(row) > 2 else 'user')
+                           for row in rows if len(row) >= 2 and row[0].strip().lower() != 'username']
+            except (UnicodeDecodeError, csv.Error) as e:
+                logger.warning(f"Rejected users CSV from {session['username']}: {e}")
+                flash('CSV file must be UTF-8 encoded comma-separated text', 'error')
+            else:
+                created = bulk_add_users(entries)
+                logger.info(f"{len(created)} users created from CSV by {session['username']}")
+                flash(f'{len(created)} user(s) created, {len(entries) - len(created)} skipped', 'success')
+        else:
+            flash('CSV file required', 'error')
+    
     elif action == 'delete_user':
         username = request.form.get('username')
-        if username and username != 'admin' and username in users:
-            del users[username]
-            save_json_file(USERS_FILE, users)
+        if username and username != 'admin' and username in USERS_STORE.data:
+            USERS_STORE.mutate(lambda users: users.pop(username, None))
+            USERS_STORE.flush()
+            clear_password_cache()
             logger.info(f"User {username} deleted by {session['username']}")
             flash(f'User {username} deleted', 'success')
         else:
@@ -1344,16 +2167,20 @@ def admin_actions():
 @login_required
 def files_raw(filename):
     """Serve files for in-browser viewing"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    # Conditional responses give ETag/304 and Range support for media seeking
+    return send_upload(filename)
 
 @app.route('/files/<path:filename>')
 @login_required
 def download(filename):
     """Download files as attachments"""
     try:
-        update_file_stats(filename, 'download')
-        logger.info(f"File downloaded: {filename} by {session['username']}")
-        return send_from_directory(UPLOAD_FOLDER, filename, as_attachment=True)
+        response = send_upload(filename, as_attachment=True)
+        # Range requests and 304s are not separate downloads
+        if response.status_code == 200:
+            update_file_stats(filename, 'download')
+            logger.info(f"File downloaded: {filename} by {session['username']}")
+        return response
     except Exception as e:
         logger.error(f"Error downloading file {filename}: {e}")
         flash('Error downloading file', 'error')
@@ -1368,38 +2195,89 @@ def upload():
         if not uploaded_files or uploaded_files[0].filename == '':
             return jsonify({'status': 'error', 'message': 'No files selected'}), 400
         
-        successful_uploads = 0
-        max_size = config.get('max_file_size', 100*1024*1024)
-        allowed_extensions = config.get('allowed_extensions', [])
+        max_size = CONFIG_STORE.data.get('max_file_size', 100*1024*1024)
+        # Built once per request so per-file checks are set lookups
+        allowed_extensions = frozenset(
+            ext.lower().lstrip('.') for ext in CONFIG_STORE.data.get('allowed_extensions', [])
+        )
+        
+        def save_one(job):
+            """Validate and save one upload; returns (result, content info or skip reason)"""
+            file, filename = job
+            if not filename:
+                logger.warning(f"File {file.filename} has an invalid name, skipped")
+                return None, 'invalid filename'
+            
+            # Check file extension
+            if allowed_extensions:
+                ext = os.path.splitext(filename)[1][1:].lower()
+                if ext not in allowed_extensions:
+                    logger.warning(f"File {file.filename} has disallowed extension, skipped")
+                    return None, 'extension not allowed'
+            
+            # Check file size without reading the upload
+            file.stream.seek(0, os.SEEK_END)
+            size = file.stream.tell()
+            file.stream.seek(0)
+            if size > max_size:
+                logger.warning(f"File {file.filename} too large, skipped")
+                return None, 'file too large'
+            
+            # Skip rewriting a file whose content is unchanged; only the
+            # upload is read, against the hash stored when the file was saved
+            filepath = os.path.join(UPLOAD_FOLDER, filename)
+            known_hash = stored_content_hash(filename, filepath)
+            if known_hash is not None and os.path.getsize(filepath) == size \
+                    and stream_hash(file.stream) == known_hash:
+                logger.info(f"File unchanged, not rewritten: {filename}")
+                return 'unchanged', None
+            
+            # Save file
+            content_hash = save_upload(file.stream, filepath)
+            st = os.stat(filepath)
+            return 'saved', {'hash': content_hash, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
         
+        # Parts that map to the same file are never saved concurrently; the
+        # last one wins, as it would if they were saved one after another
+        jobs = {}
         for file in uploaded_files:
             if file and file.filename:
-                # Check file size
-                if len(file.read()) > max_size:
-                    logger.warning(f"File {file.filename} too large, skipped")
-                    continue
-                
-                file.seek(0)  # Reset file pointer
-                
-                # Check file extension
-                if allowed_extensions:
-                    ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
-                    if ext not in allowed_extensions:
-                        logger.warning(f"File {file.filename} has disallowed extension, skipped")
-                        continue
-                
-                # Save file
-                filepath = os.path.join(UPLOAD_FOLDER, file.filename)
-                file.save(filepath)
-                update_file_stats(file.filename, 'upload')
-                successful_uploads += 1
-                logger.info(f"File uploaded: {file.filename} by {session['username']}")
+                filename = clean_upload_name(file.filename)
+                jobs[os.path.normcase(filename) if filename else id(file)] = (file, filename)
+        
+        # Saves release the GIL, so several files can be written concurrently
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            results = list(executor.map(save_one, jobs.values()))
+        
+        saved = {}
+        renamed = []
+        skipped = []
+        for (file, filename), (result, detail) in zip(jobs.values(), results):
+            if result is None:
+                skipped.append({'original': file.filename, 'filename': filename, 'reason': detail})
+                continue
+            if result == 'saved':
+                saved[filename] = detail
+            if filename != file.filename:
+                renamed.append({'original': file.filename, 'filename': filename})
+        
+        if saved:
+            invalidate_file_list_cache()
+            update_file_stats_bulk(saved, 'upload')
+            record_file_contents(saved)
+        for filename in saved:
+            logger.info(f"File uploaded: {filename} by {session['username']}")
+        successful_uploads = len(jobs) - len(skipped)
         
         return jsonify({
             'status': 'success', 
-            'message': f'{successful_uploads} file(s) uploaded successfully'
+            'message': f'{successful_uploads} file(s) uploaded successfully',
+            'renamed': renamed,
+            'skipped': skipped
         })
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         logger.error(f"Error uploading files: {e}")
         return jsonify({'status': 'error', 'message': 'Upload failed'}), 500
@@ -1409,13 +2287,12 @@ def upload():
 def delete(filename):
     """Delete files"""
     try:
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        if os.path.exists(file_path):
+        file_path = upload_path(filename)
+        if file_path and os.path.isfile(file_path):
             os.remove(file_path)
+            invalidate_file_list_cache()
             # Remove from stats
-            if filename in file_stats:
-                del file_stats[filename]
-                save_json_file(STATS_FILE, file_stats)
+            remove_file_stats(filename)
             logger.info(f"File deleted: {filename} by {session['username']}")
             flash(f'File {filename} deleted successfully', 'success')
         else:
@@ -1430,26 +2307,42 @@ def delete(filename):
 @login_required
 def bulk_delete():
     """Delete multiple files"""
+    deleted = []
+    failed = []
     try:
         data = request.get_json()
         filenames = data.get('files', [])
-        deleted_count = 0
         
         for filename in filenames:
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            if os.path.exists(file_path):
+            file_path = upload_path(filename)
+            if file_path is None:
+                failed.append({'filename': filename, 'error': 'invalid filename'})
+                continue
+            try:
                 os.remove(file_path)
-                if filename in file_stats:
-                    del file_stats[filename]
-                deleted_count += 1
-                logger.info(f"File deleted: {filename} by {session['username']}")
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.error(f"Error deleting file {filename}: {e}")
+                failed.append({'filename': filename, 'error': e.strerror or str(e)})
+                continue
+            deleted.append(filename)
+            logger.info(f"File deleted: {filename} by {session['username']}")
         
-        save_json_file(STATS_FILE, file_stats)
-        return jsonify({'success': True, 'message': f'{deleted_count} files deleted'})
+        return jsonify({
+            'success': not failed,
+            'message': f'{len(deleted)} files deleted',
+            'failed': failed
+        })
         
     except Exception as e:
         logger.error(f"Error in bulk delete: {e}")
-        return jsonify({'success': False, 'message': str(e)})
+        return jsonify({'success': False, 'message': str(e), 'failed': failed})
+    finally:
+        # Whatever was removed before an error still leaves the listing and stats
+        if deleted:
+            invalidate_file_list_cache()
+            remove_file_stats_bulk(deleted)
 
 @app.route('/bulk-download', methods=['POST'])
 @login_required
@@ -1457,26 +2350,33 @@ def bulk_download():
     """Download multiple files as zip"""
     try:
         import zipfile
-        import io
+        from flask import Response
         
         filenames = request.form.getlist('files[]')
+        paths = {}
+        for filename in filenames:
+            file_path = upload_path(filename)
+            if file_path and os.path.isfile(file_path):
+                paths[filename] = file_path
         
-        # Create zip file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for filename in filenames:
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                if os.path.exists(file_path):
-                    zip_file.write(file_path, filename)
-                    update_file_stats(filename, 'download')
-        
-        zip_buffer.seek(0)
-        
+        update_file_stats_bulk(list(paths), 'download')
         logger.info(f"Bulk download of {len(filenames)} files by {session['username']}")
         
-        from flask import Response
+        def generate():
+            # Stored, not deflated: uploads are mostly already-compressed media
+            sink = _ZipStream()
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zip_file:
+                for filename, file_path in paths.items():
+                    zinfo = zipfile.ZipInfo.from_file(file_path, filename)
+                    with open(file_path, 'rb') as src, zip_file.open(zinfo, 'w') as dst:
+                        for chunk in iter(partial(src.read, ZIP_CHUNK_SIZE), b''):
+                            dst.write(chunk)
+                            yield sink.drain()
+                    yield sink.drain()
+            yield sink.drain()
+        
         return Response(
-            zip_buffer.getvalue(),
+            generate(),
             mimetype='application/zip',
             headers={'Content-Disposition': 'attachment; filename=files.zip'}
         )
@@ -1486,6 +2386,20 @@ def bulk_download():
         flash('Error creating download', 'error')
         return redirect(url_for('files'))
 
+@app.route('/stats', methods=['POST'])
+@login_required
+def update_stats_bulk():
+    """Record a batch of file events, e.g. queued preview views"""
+    try:
+        # Beacons arrive as text/plain
+        data = request.get_json(force=True, silent=True) or {}
+        filenames = [name for name in data.get('files', []) if isinstance(name, str)]
+        update_file_stats_bulk(filenames, data.get('action'))
+        return jsonify({'success': True})
+    except Exception as e:
+        logger.error(f"Error updating stats: {e}")
+        return jsonify({'success': False})
+
 @app.route('/stats/<path:filename>', methods=['POST'])
 @login_required
 def update_stats(filename):
@@ -1505,6 +2419,7 @@ def logout():
     """Handle logout"""
     username = session.get('username')
     session.clear()
+    clear_password_cache()
     logger.info(f"User {username} logged out")
     flash('You have been logged out', 'info')
     return redirect(url_for('login'))
@@ -1523,9 +2438,13 @@ def notepad():
                 filename += '.txt'
             
             # Save the content
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
+            filepath = upload_path(filename)
+            if filepath is None:
+                flash('Invalid filename', 'error')
+                return redirect(url_for('notepad'))
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
+            invalidate_file_list_cache()
             
             # Update file stats
             update_file_stats(filename, 'upload')
@@ -1540,22 +2459,21 @@ def notepad():
     
     # Get list of existing notepad files
     notepad_files = []
-    for filename in os.listdir(UPLOAD_FOLDER):
-        if filename.endswith('.txt'):
-            path = os.path.join(UPLOAD_FOLDER, filename)
-            if os.path.isfile(path):
-                modified = datetime.datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+    with os.scandir(UPLOAD_FOLDER) as entries:
+        for entry in entries:
+            if entry.name.endswith('.txt') and entry.is_file():
+                modified = datetime.datetime.fromtimestamp(entry.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
                 notepad_files.append({
-                    'name': filename,
+                    'name': entry.name,
                     'modified': modified
                 })
     
-    return render_template_string(
-        TEMPLATE,
+    return render_template(
+        COMPILED_TEMPLATE,
         session=session,
         page='notepad',
         notepad_files=sorted(notepad_files, key=lambda x: x['modified'], reverse=True),
-        theme=config.get('theme', 'light')
+        theme=CONFIG_STORE.data.get('theme', 'light')
     )
 
 @app.route('/notepad/<path:filename>')
@@ -1563,45 +2481,38 @@ def notepad():
 def load_notepad(filename):
     """Load notepad content"""
     try:
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        if os.path.exists(filepath):
+        filepath = upload_path(filename)
+        if filepath and os.path.isfile(filepath):
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
             return jsonify({'success': True, 'content': content})
         return jsonify({'success': False, 'message': 'File not found'})
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'File is not UTF-8 text'})
     except Exception as e:
         logger.error(f"Error loading notepad {filename}: {e}")
-        return jsonify({'success': False, 'message': str(e)})
+        return jsonify({'success': False, 'message': 'Error loading file'})
 
 @app.errorhandler(404)
 def not_found(error):
-    return render_template_string('''
-    <div class="container mt-5">
-        <div class="text-center">
-            <h1>404 - Page Not Found</h1>
-            <p>The page you're looking for doesn't exist.</p>
-            <a href="{{ url_for('files') }}" class="btn btn-primary">Go Home</a>
-        </div>
-    </div>
-    '''), 404
+    return render_template(ERROR_TEMPLATE, title='404 - Page Not Found',
+                           message="The page you're looking for doesn't exist."), 404
+
+@app.errorhandler(RequestEntityTooLarge)
+def too_large(error):
+    logger.warning(f"Upload rejected, request exceeds {format_file_size(app.config['MAX_CONTENT_LENGTH'])}")
+    return jsonify({'status': 'error', 'message': 'Upload too large, send fewer files at once'}), 413
 
 @app.errorhandler(500)
 def internal_error(error):
     logger.error(f"Internal server error: {error}")
-    return render_template_string('''
-    <div class="container mt-5">
-        <div class="text-center">
-            <h1>500 - Internal Server Error</h1>
-            <p>Something went wrong on our end.</p>
-            <a href="{{ url_for('files') }}" class="btn btn-primary">Go Home</a>
-        </div>
-    </div>
-    '''), 500
+    return render_template(ERROR_TEMPLATE, title='500 - Internal Server Error',
+                           message='Something went wrong on our end.'), 500
 
-def run_server():
+def run_server(dev=False):
     """Run the Flask server"""
-    host = config.get('host', '0.0.0.0')
-    port = config.get('port', 50588)
+    host = CONFIG_STORE.data.get('host', '0.0.0.0')
+    port = CONFIG_STORE.data.get('port', 50588)
     
     logger.info("=" * 60)
     logger.info("Enhanced File Server Starting")
@@ -1619,7 +2530,15 @@ def run_server():
     
     logger.info("=" * 60)
     
-    app.run(host=host, port=port, debug=False, threaded=True)
+    # Single process: the JSON stores and caches live in this interpreter.
+    # waitress reads its body limit once, so raising it needs a restart
+    if waitress_serve is not None and not dev:
+        waitress_serve(app, host=host, port=port, threads=SERVER_THREADS,
+                       max_request_body_size=app.config['MAX_CONTENT_LENGTH'])
+    else:
+        if not dev:
+            logger.warning("waitress not installed, using the development server")
+        app.run(host=host, port=port, debug=False, threaded=True)
 
 def start_server_background():
     """Start the server in a background thread"""
@@ -1629,16 +2548,13 @@ def start_server_background():
     return server_thread
 
 if __name__ == '__main__':
-    # Initialize mimetypes
-    mimetypes.init()
-    
     # Save default configuration if not exists
     if not os.path.exists(CONFIG_FILE):
-        save_json_file(CONFIG_FILE, config)
+        CONFIG_STORE.save()
     
     # Save default users if not exists
     if not os.path.exists(USERS_FILE):
-        save_json_file(USERS_FILE, users)
+        USERS_STORE.save()
     
     # Run server
-    run_server()
\ No newline at end of file
+    run_server(dev='--dev' in sys.argv)
\ No newline at end of file
@@ -54,6 +54,22 @@ if errorlevel 1 (
     echo [SUCCESS] Flask installed/updated successfully
 )
 echo.
+echo Installing argon2-cffi...
+pip install argon2-cffi --quiet --upgrade
+if errorlevel 1 (
+    echo [WARNING] Failed to install argon2-cffi. Falling back to PBKDF2...
+) else (
+    echo [SUCCESS] argon2-cffi installed/updated successfully
+)
+echo.
+echo Installing waitress...
+pip install waitress --quiet --upgrade
+if errorlevel 1 (
+    echo [WARNING] Failed to install waitress. Falling back to the development server...
+) else (
+    echo [SUCCESS] waitress installed/updated successfully
+)
+echo.
 
 :: Step 3: Network Interface Detection
 echo [STEP 3/7] Detecting network interfaces...
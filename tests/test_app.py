@@ -0,0 +1,307 @@
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+app = None
+_data_dir = None
+
+
+def setUpModule():
+    # app.py serves and stores everything under the working directory
+    global app, _data_dir
+    _data_dir = tempfile.mkdtemp()
+    os.chdir(_data_dir)
+    sys.path.insert(0, REPO_DIR)
+    app = importlib.import_module('app')
+    app.app.config['TESTING'] = True
+
+
+def tearDownModule():
+    app.flush_stores()
+    os.chdir(REPO_DIR)
+    shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+class AppTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.client.post('/', data={'username': 'admin', 'password': '1234'})
+
+    def upload(self, *files):
+        return self.client.post('/upload', data={
+            'files': [(io.BytesIO(data), name) for name, data in files]
+        }, content_type='multipart/form-data')
+
+
+class UploadTests(AppTestCase):
+
+    def test_colliding_names_are_saved_once(self):
+        first, second = b'a' * (5 * 1024 * 1024), b'b' * (5 * 1024 * 1024)
+        for _ in range(3):
+            response = self.upload(('clip.mp4', first), ('clip.mp4', second))
+            self.assertEqual(response.status_code, 200)
+            with open(os.path.join(_data_dir, 'clip.mp4'), 'rb') as f:
+                self.assertEqual(f.read(), second)
+            first, second = second, first
+        self.assertFalse([name for name in os.listdir(_data_dir) if name.endswith('.part')])
+
+    def test_unicode_names_are_kept(self):
+        response = self.upload(('报告.txt', b'report'), ('résumé.pdf', b'cv'))
+        body = response.get_json()
+        self.assertEqual(body['renamed'], [])
+        self.assertEqual(body['skipped'], [])
+        for name in ('报告.txt', 'résumé.pdf'):
+            self.assertTrue(os.path.isfile(os.path.join(_data_dir, name)))
+
+    def test_rejected_and_renamed_names_are_reported(self):
+        response = self.upload(('../escape.txt', b'x'), ('.hidden.txt', b'x'), ('users.json', b'{}'))
+        body = response.get_json()
+        self.assertEqual(body['renamed'], [{'original': '../escape.txt', 'filename': 'escape.txt'}])
+        self.assertEqual({entry['original'] for entry in body['skipped']}, {'.hidden.txt', 'users.json'})
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(_data_dir), 'escape.txt')))
+
+
+    def test_identical_reupload_is_not_rewritten(self):
+        self.upload(('same.txt', b'content'))
+        path = os.path.join(_data_dir, 'same.txt')
+        mtime = os.stat(path).st_mtime_ns
+        self.assertIn('hash', app.STATS_STORE.data['same.txt']['content'])
+        
+        self.upload(('same.txt', b'content'))
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.upload(('same.txt', b'changed'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'changed')
+
+    def test_size_limit_applies_per_file(self):
+        with mock.patch.dict(app.CONFIG_STORE.data, {'max_file_size': 1000}), \
+             mock.patch.dict(app.app.config, {'MAX_CONTENT_LENGTH': app.request_size_limit({'max_file_size': 1000})}):
+            response = self.upload(('batch-1.txt', b'1' * 800), ('batch-2.txt', b'2' * 800),
+                                   ('big.txt', b'3' * 1500))
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([(entry['original'], entry['reason']) for entry in body['skipped']],
+                         [('big.txt', 'file too large')])
+        for name in ('batch-1.txt', 'batch-2.txt'):
+            self.assertTrue(os.path.isfile(os.path.join(_data_dir, name)))
+
+    def test_download_etag_is_stat_based(self):
+        self.upload(('etag.txt', b'one'))
+        st = os.stat(os.path.join(_data_dir, 'etag.txt'))
+        response = self.client.get('/files/etag.txt')
+        self.assertEqual(response.headers['ETag'], f'"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"')
+        response = self.client.get('/files/etag.txt', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class FileListTests(AppTestCase):
+
+    def test_search_covers_every_page(self):
+        for i in range(5):
+            with open(os.path.join(_data_dir, f'page-{i}.txt'), 'w') as f:
+                f.write(str(i))
+        with open(os.path.join(_data_dir, 'needle.png'), 'wb') as f:
+            f.write(b'png')
+        app.invalidate_file_list_cache()
+        
+        response = self.client.get('/files?per_page=1&q=needle')
+        self.assertIn(b'data-filename="needle.png"', response.data)
+        response = self.client.get('/files?per_page=1&type=text&page=2')
+        self.assertIn(b'type=text', response.data)
+        self.assertNotIn(b'data-filename="needle.png"', response.data)
+
+
+    def test_stats_writes_keep_the_listing_cache(self):
+        app.get_file_list()
+        cached = app._file_list_cache['files']
+        app.update_file_stats('needle.png', 'view')
+        app.flush_stores()
+        self.assertIs(app.get_file_list(), cached)
+
+
+
+class BulkDeleteTests(AppTestCase):
+
+    def test_partial_failure_still_cleans_up(self):
+        self.upload(('gone.txt', b'1'), ('stuck.txt', b'2'))
+        real_remove = os.remove
+
+        def remove(path):
+            if path.endswith('stuck.txt'):
+                raise PermissionError(13, 'Permission denied')
+            real_remove(path)
+
+        with mock.patch('os.remove', side_effect=remove):
+            response = self.client.post('/bulk-delete', json={'files': ['gone.txt', 'stuck.txt', '../x.txt']})
+        body = response.get_json()
+        self.assertFalse(body['success'])
+        self.assertEqual([entry['filename'] for entry in body['failed']], ['stuck.txt', '../x.txt'])
+        self.assertNotIn('gone.txt', app.STATS_STORE.data)
+        self.assertIn('stuck.txt', app.STATS_STORE.data)
+        self.assertNotIn('gone.txt', [file['name'] for file in app.get_file_list()])
+
+
+class HiddenFileTests(AppTestCase):
+
+    def test_session_key_is_not_reachable(self):
+        self.assertEqual(os.path.dirname(app.SECRET_KEY_FILE), app.DATA_FOLDER)
+        for name in ('.data/.secret_key', '.secret_key', '../package/app.py'):
+            body = self.client.get('/notepad/' + name).get_json()
+            self.assertEqual(body, {'success': False, 'message': 'File not found'})
+            self.client.post('/delete/' + name)
+        self.assertTrue(os.path.isfile(app.SECRET_KEY_FILE))
+        self.assertEqual(self.client.get('/files_raw/.data/.secret_key').status_code, 404)
+
+    def test_notepad_does_not_echo_decode_errors(self):
+        with open(os.path.join(_data_dir, 'binary.txt'), 'wb') as f:
+            f.write(b'ab\xb5\xff')
+        body = self.client.get('/notepad/binary.txt').get_json()
+        self.assertEqual(body, {'success': False, 'message': 'File is not UTF-8 text'})
+
+
+class AdminTests(AppTestCase):
+
+    def import_users(self, data):
+        return self.client.post('/admin', data={
+            'action': 'bulk_add_users', 'users_csv': (io.BytesIO(data), 'users.csv')
+        }, content_type='multipart/form-data', follow_redirects=True)
+
+    def test_csv_import(self):
+        response = self.import_users(b'username,password,role\ncsv-alice,pw,user\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('csv-alice', app.USERS_STORE.data)
+
+    def test_non_utf8_csv_is_rejected(self):
+        response = self.import_users(b'bob,\xff\xfe,user\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'must be UTF-8', response.data)
+        self.assertNotIn('bob', app.USERS_STORE.data)
+
+
+class StatsTests(AppTestCase):
+
+    def test_mutations_leave_readers_snapshot_alone(self):
+        app.update_file_stats('reader.txt', 'view')
+        snapshot = app.STATS_STORE.data
+        for filename in snapshot:
+            app.update_file_stats(filename + '.new', 'view')
+            app.remove_file_stats('reader.txt')
+        self.assertIn('reader.txt', snapshot)
+        self.assertNotIn('reader.txt', app.STATS_STORE.data)
+
+    def test_beacon_batch_is_accepted_as_text(self):
+        before = app.STATS_STORE.data.get('beacon.txt', {}).get('views', 0)
+        response = self.client.post('/stats', data='{"action": "view", "files": ["beacon.txt", "beacon.txt"]}',
+                                    content_type='text/plain;charset=UTF-8')
+        self.assertTrue(response.get_json()['success'])
+        self.assertEqual(app.STATS_STORE.data['beacon.txt']['views'], before + 2)
+
+
+class ConditionalRequestTests(AppTestCase):
+
+    def assert_revalidates_with_coding_suffix(self, url):
+        etag = self.client.get(url).headers['ETag']
+        for coding in ('gzip', 'br'):
+            suffixed = etag[:-1] + ':' + coding + '"'
+            response = self.client.get(url, headers={'If-None-Match': suffixed})
+            self.assertEqual(response.status_code, 304)
+
+    def test_file_page_matches_compressed_etag(self):
+        self.client.get('/files')  # consume any pending flash messages
+        self.assert_revalidates_with_coding_suffix('/files')
+
+    def test_page_asset_matches_compressed_etag(self):
+        self.assert_revalidates_with_coding_suffix('/assets/app.css')
+
+
+
+# Stubs a browser just far enough to run the filter code from PAGE_JS
+FILTER_HARNESS = """
+const posted = [];
+class Worker {
+  constructor(url) { Worker.last = this; }
+  postMessage(message) { posted.push(message); }
+}
+const window = {Worker: Worker};
+const URL = {createObjectURL: () => 'blob:filter'};
+class Blob { constructor(parts) { this.source = parts.join(''); } }
+const element = name => ({name: name, hidden: null, classList: {toggle(cls, on) { this.owner.hidden = on; }}});
+const elements = {
+  searchInput: {value: 'Report'},
+  typeFilter: {value: ''},
+  filesGridView: {dataset: {workerMinEntries: '2'}}
+};
+const document = {getElementById: id => elements[id]};
+let fileEntries = ['report.pdf', 'photo.png'].map(name => {
+  const el = element(name);
+  el.classList.owner = el;
+  return {el: el, name: name, type: name.endsWith('.pdf') ? 'pdf' : 'image'};
+});
+const hidden = () => fileEntries.map(entry => entry.el.hidden);
+%s
+const result = {};
+startFilterWorker();
+result.items = posted[0].items;
+filterFiles();
+result.query = posted[1];
+Worker.last.onmessage({data: {id: 0, visible: new Uint8Array([0, 0])}});
+result.afterStale = hidden();
+Worker.last.onmessage({data: {id: posted[1].id, visible: new Uint8Array([0, 1])}});
+result.afterReply = hidden();
+Worker.last.onerror();
+result.workerAfterError = filterWorker;
+result.afterFallback = hidden();
+
+let workerReply = null;
+const workerScope = new Function('postMessage', FILTER_WORKER_SRC + '; return onmessage;');
+const workerOnMessage = workerScope(message => { workerReply = message; });
+workerOnMessage({data: {items: result.items}});
+workerOnMessage({data: {id: 7, q: 'photo', type: ''}});
+result.workerReply = {id: workerReply.id, visible: Array.from(workerReply.visible)};
+console.log(JSON.stringify(result));
+"""
+
+
+class FilterWorkerTests(AppTestCase):
+
+    def test_threshold_is_reachable_only_by_large_pages(self):
+        response = self.client.get('/files')
+        self.assertIn(f'data-worker-min-entries="{app.FILTER_WORKER_MIN_ENTRIES}"'.encode(), response.data)
+        # Two entries per file: a default page stays synchronous, a maximum page does not
+        self.assertLess(2 * app.FILES_PER_PAGE, app.FILTER_WORKER_MIN_ENTRIES)
+        self.assertLessEqual(app.FILTER_WORKER_MIN_ENTRIES, 2 * app.MAX_FILES_PER_PAGE)
+
+    def test_handoff_and_error_fallback(self):
+        node = shutil.which('node')
+        if node is None:
+            self.skipTest('node is not installed')
+        source = re.search(r'const FILTER_WORKER_SRC = .*?\nfunction applyFilter\(visible\) \{.*?\n\}',
+                           app.PAGE_JS, re.S).group(0)
+        output = subprocess.run([node, '-e', FILTER_HARNESS % source], capture_output=True,
+                                text=True, check=True).stdout
+        result = json.loads(output)
+        
+        self.assertEqual(result['items'], [{'name': 'report.pdf', 'type': 'pdf'},
+                                           {'name': 'photo.png', 'type': 'image'}])
+        self.assertEqual(result['query'], {'id': 1, 'q': 'report', 'type': ''})
+        self.assertEqual(result['afterStale'], [None, None])
+        self.assertEqual(result['afterReply'], [True, False])
+        # A worker that fails to load hands filtering back to the main thread
+        self.assertIsNone(result['workerAfterError'])
+        self.assertEqual(result['afterFallback'], [False, True])
+        self.assertEqual(result['workerReply'], {'id': 7, 'visible': [0, 1]})
+
+
+if __name__ == '__main__':
+    unittest.main()